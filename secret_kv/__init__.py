@@ -6,49 +6,112 @@
 """Package secret_kv provides encrypted rich key/value storage for an application or project
 """
 
-from .version import __version__
-
-from .internal_types import Jsonable, JsonableDict, XJsonable, XJsonableDict
-from .store import KvStore
-from .sql_store import SqlKvStore
-from .value import (
-    KvValue,
-    xjson_encode,
-    xjson_decode,
-    xjson_encode_simple_jsonable,
-    xjson_decode_simple_jsonable,
-    validate_simple_jsonable,
-  )
-
-from .exceptions import (
-    KvError,
-    KvNoEnumerationError,
-    KvReadOnlyError,
-    KvNoPassphraseError,
-  )
-  
-from .config import (
-    Config,
-    ConfigContext,
-    KvStoreConfig,
-    SqlKvStoreConfig,
-    PassphraseConfig,
-    KeyringPassphraseConfig,
-  )
-
-from .simple import (
-    get_kv_store_passphrase_keyring_service,
-    get_kv_store_default_passphrase_keyring_key,
-    get_kv_store_passphrase_keyring_key,
-    get_kv_store_default_passphrase,
-    set_kv_store_default_passphrase,
-    get_kv_store_passphrase,
-    set_kv_store_passphrase,
-    load_any_config_file,
-    load_kv_store_config,
-    create_kv_store,
-    locate_kv_store_config_file,
-    open_kv_store,
-    delete_kv_store,
-  )
+from typing import TYPE_CHECKING
 
+import importlib
+import os
+
+_LAZY_ATTRS = {
+    '__version__': '.version',
+    'Jsonable': '.internal_types',
+    'JsonableDict': '.internal_types',
+    'XJsonable': '.internal_types',
+    'XJsonableDict': '.internal_types',
+    'KvStore': '.store',
+    'SqlKvStore': '.sql_store',
+    'KvValue': '.value',
+    'xjson_encode': '.value',
+    'xjson_decode': '.value',
+    'xjson_encode_simple_jsonable': '.value',
+    'xjson_decode_simple_jsonable': '.value',
+    'validate_simple_jsonable': '.value',
+    'KvError': '.exceptions',
+    'KvNoEnumerationError': '.exceptions',
+    'KvReadOnlyError': '.exceptions',
+    'KvNoPassphraseError': '.exceptions',
+    'Config': '.config',
+    'ConfigContext': '.config',
+    'KvStoreConfig': '.config',
+    'SqlKvStoreConfig': '.config',
+    'PassphraseConfig': '.config',
+    'KeyringPassphraseConfig': '.config',
+    'get_kv_store_passphrase_keyring_service': '.simple',
+    'get_kv_store_default_passphrase_keyring_key': '.simple',
+    'get_kv_store_passphrase_keyring_key': '.simple',
+    'get_kv_store_default_passphrase': '.simple',
+    'set_kv_store_default_passphrase': '.simple',
+    'get_kv_store_passphrase': '.simple',
+    'set_kv_store_passphrase': '.simple',
+    'load_any_config_file': '.simple',
+    'load_kv_store_config': '.simple',
+    'create_kv_store': '.simple',
+    'locate_kv_store_config_file': '.simple',
+    'open_kv_store': '.simple',
+    'delete_kv_store': '.simple',
+  }
+"""Maps each lazily imported public name to the submodule that provides it.
+   Submodules are only imported when one of their names is first accessed,
+   so that (e.g.) "import secret_kv" does not pull in sqlcipher3 or keyring."""
+
+__all__ = list(_LAZY_ATTRS)
+
+if TYPE_CHECKING:
+  from .version import __version__
+  from .internal_types import Jsonable, JsonableDict, XJsonable, XJsonableDict
+  from .store import KvStore
+  from .sql_store import SqlKvStore
+  from .value import (
+      KvValue,
+      xjson_encode,
+      xjson_decode,
+      xjson_encode_simple_jsonable,
+      xjson_decode_simple_jsonable,
+      validate_simple_jsonable,
+    )
+  from .exceptions import (
+      KvError,
+      KvNoEnumerationError,
+      KvReadOnlyError,
+      KvNoPassphraseError,
+    )
+  from .config import (
+      Config,
+      ConfigContext,
+      KvStoreConfig,
+      SqlKvStoreConfig,
+      PassphraseConfig,
+      KeyringPassphraseConfig,
+    )
+  from .simple import (
+      get_kv_store_passphrase_keyring_service,
+      get_kv_store_default_passphrase_keyring_key,
+      get_kv_store_passphrase_keyring_key,
+      get_kv_store_default_passphrase,
+      set_kv_store_default_passphrase,
+      get_kv_store_passphrase,
+      set_kv_store_passphrase,
+      load_any_config_file,
+      load_kv_store_config,
+      create_kv_store,
+      locate_kv_store_config_file,
+      open_kv_store,
+      delete_kv_store,
+    )
+
+def __getattr__(name: str):
+  """PEP 562 lazy attribute loader; imports the backing submodule on first access."""
+  module_name = _LAZY_ATTRS.get(name)
+  if module_name is None:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  module = importlib.import_module(module_name, __name__)
+  value = getattr(module, name)
+  globals()[name] = value
+  return value
+
+def __dir__():
+  return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+if os.environ.get('SECRET_KV_EAGER_IMPORT'):
+  # Eagerly resolve every lazy attribute; useful for CI sanity checks.
+  for _name in list(_LAZY_ATTRS):
+    __getattr__(_name)
@@ -0,0 +1,1005 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2022 Samuel J. McKelvie
+#
+# MIT License - See LICENSE file accompanying this package.
+#
+
+"""Command-line interface for secret_kv package.
+
+   The "secret-kv" console script and "python3 -m secret_kv" both enter through
+   the lightweight shim in __main__.py, which defers loading this module (and
+   everything it drags in) until the CLI is actually being run.
+"""
+
+
+from typing import Optional, Sequence, List, Union, Dict, TextIO, ClassVar, TYPE_CHECKING
+from functools import cached_property, lru_cache
+
+import os
+import sys
+import argparse
+
+# Heavy imports (colorama, argcomplete, subprocess, json, base64, and the
+# secret_kv store/config machinery) are deferred into the methods that use
+# them so that cheap invocations like "--version" and "--help" do not pay
+# for them at startup.
+if TYPE_CHECKING:
+  from secret_kv import (
+      KvStoreConfig,
+      KvStore,
+      KvValue,
+      Jsonable,
+      XJsonable,
+    )
+
+_dumps_compact = None
+_dumps_pretty = None
+_loads_impl = None
+
+def _init_json() -> None:
+  """Binds the CLI JSON serializers and parser. Output formatting prefers
+     orjson (a C extension, several times faster than stdlib json, especially
+     when indenting) when it is installed; value-bearing input is always
+     parsed with stdlib json, because orjson silently turns integer literals
+     beyond 64 bits into lossy floats. Deferred so only commands that touch
+     JSON pay the import."""
+  global _dumps_compact, _dumps_pretty, _loads_impl
+  import json
+  _loads_impl = json.loads
+  std_compact = lambda value, nl=False: json.dumps(value, separators=(',', ':'), sort_keys=True) + ('\n' if nl else '')
+  std_pretty = lambda value, nl=False: json.dumps(value, indent=2, sort_keys=True) + ('\n' if nl else '')
+  try:
+    import orjson # type: ignore[import]
+    opt_compact = orjson.OPT_SORT_KEYS
+    opt_pretty = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+    opt_nl = orjson.OPT_APPEND_NEWLINE
+    # OPT_APPEND_NEWLINE emits the trailing newline in the same serialization
+    # pass, avoiding a separate concat/write for it
+    def _dumps_compact_impl(value: 'Jsonable', nl: bool=False) -> str:
+      try:
+        return orjson.dumps(value, option=opt_compact | (opt_nl if nl else 0)).decode('utf-8')
+      except TypeError:
+        # e.g. an integer beyond 64 bits, which stdlib handles
+        return std_compact(value, nl)
+    def _dumps_pretty_impl(value: 'Jsonable', nl: bool=False) -> str:
+      try:
+        return orjson.dumps(value, option=opt_pretty | (opt_nl if nl else 0)).decode('utf-8')
+      except TypeError:
+        return std_pretty(value, nl)
+    _dumps_compact = _dumps_compact_impl
+    _dumps_pretty = _dumps_pretty_impl
+  except ImportError:
+    _dumps_compact = std_compact
+    _dumps_pretty = std_pretty
+
+def _dumps(value: 'Jsonable', compact: bool=False, newline: bool=False) -> str:
+  if _dumps_compact is None:
+    _init_json()
+  return (_dumps_compact if compact else _dumps_pretty)(value, newline) # type: ignore[misc]
+
+def _loads(text: Union[str, bytes]) -> 'Jsonable':
+  # both backends raise a ValueError subclass on malformed input
+  if _loads_impl is None:
+    _init_json()
+  return _loads_impl(text) # type: ignore[misc]
+
+_json_token_re = None
+
+def _colorize_json(text: str) -> str:
+  """Adds ANSI colors to a serialized JSON document: keys bright blue, strings
+     green, numbers yellow, keyword literals cyan. In-process replacement for
+     piping through a jq subprocess, which cost a fork/exec per call."""
+  global _json_token_re
+  from colorama import Fore, Style
+  if _json_token_re is None:
+    import re
+    # Input is known-valid JSON straight from the serializer, so a simple
+    # token scan is reliable: a string (optionally a key, i.e. followed by
+    # a colon), a keyword literal, or a number.
+    _json_token_re = re.compile(
+        r'("(?:\\.|[^"\\])*")(\s*:)?|\b(true|false|null)\b|(-?\d[\d.eE+\-]*)')
+  reset = Style.RESET_ALL
+  def repl(m) -> str:
+    s, colon, keyword, number = m.group(1, 2, 3, 4)
+    if s is not None:
+      if colon:
+        return f"{Style.BRIGHT}{Fore.BLUE}{s}{reset}{colon}"
+      return f"{Fore.GREEN}{s}{reset}"
+    if keyword is not None:
+      return f"{Fore.CYAN}{keyword}{reset}"
+    return f"{Fore.YELLOW}{number}{reset}"
+  return _json_token_re.sub(repl, text)
+
+_VTYPE_FLAGS = (
+    (('-x', '--xjson'), 'xjson'),
+    (('--json',), 'json'),
+    (('--int',), 'int'),
+    (('--float',), 'float'),
+    (('--bool',), 'bool'),
+    (('--binary',), 'binary'),
+    (('--base64',), 'base64'),
+  )
+"""(option strings, value type) pairs for the value-type shortcut flags on "set"."""
+
+# Maps every accepted boolean literal (common casings pre-materialized, so the
+# usual spellings resolve without a .lower() allocation) to its canonical form.
+_BOOL_MAP = {}
+for _lit in ( 'true', 't', 'yes', 'y', '1', 'TRUE', 'T', 'YES', 'Y', 'True', 'Yes' ):
+  _BOOL_MAP[_lit] = 'true'
+for _lit in ( 'false', 'f', 'no', 'n', '0', 'FALSE', 'F', 'NO', 'N', 'False', 'No' ):
+  _BOOL_MAP[_lit] = 'false'
+del _lit
+
+def _coerce_bool(s: str) -> str:
+  if len(s) > 5:  # no boolean literal is longer than 'false'
+    raise ValueError(f"'{s}'")
+  mapped = _BOOL_MAP.get(s)
+  if mapped is None:
+    mapped = _BOOL_MAP.get(s.lower())
+  if mapped is None:
+    raise ValueError(f"'{s}'")
+  return mapped
+
+def _coerce_json(s: str) -> 'XJsonable':
+  if not '@xjson_type' in s:
+    # No extended-value markers (or escaped keys, which contain the marker as a
+    # substring) anywhere in the text, so the encode/decode walk is the identity
+    # on freshly parsed JSON; skip both tree walks.
+    return _loads(s)
+  from secret_kv.value import xjson_decode, xjson_encode_simple_jsonable
+  return xjson_decode(xjson_encode_simple_jsonable(_loads(s)))
+
+def _coerce_xjson(s: str) -> 'XJsonable':
+  if not '@xjson_type' in s:
+    return _loads(s)
+  from secret_kv.value import xjson_decode
+  return xjson_decode(_loads(s))
+
+_COERCERS = {
+    'int': (int, 'Invalid integer literal'),
+    'float': (float, 'Invalid float literal'),
+    'bool': (_coerce_bool, 'Invalid boolean literal'),
+    'json': (_coerce_json, 'Invalid JSON text'),
+    'xjson': (_coerce_xjson, 'Invalid extended JSON text'),
+  }
+"""Value-type coercers for "set": one dict lookup replaces an if/elif chain.
+   Each entry is (coercer, error description); coercers raise ValueError
+   (json.JSONDecodeError is a ValueError subclass) on bad input."""
+
+@lru_cache(maxsize=64)
+def _abspath(cwd: str, path: str) -> str:
+  """Resolves path against an already-absolute cwd with pure string work
+     (os.path.abspath would redo getcwd per call); memoized since handlers
+     resolve the same few paths repeatedly."""
+  path = os.path.expanduser(path)
+  if not os.path.isabs(path):
+    path = os.path.join(cwd, path)
+  return os.path.normpath(path)
+
+@lru_cache(maxsize=4)
+def is_colorizable(stream: TextIO) -> bool:
+  # cached per stream object: isatty() is a syscall and the answer cannot
+  # change for the lifetime of the stream
+  return hasattr(stream, 'isatty') and stream.isatty()
+
+class CmdExitError(RuntimeError):
+  exit_code: int
+
+  def __init__(self, exit_code: int, msg: Optional[str]=None):
+    if msg is None:
+      msg = f"Command exited with return code {exit_code}"
+    super().__init__(msg)
+    self.exit_code = exit_code
+
+class ArgparseExitError(CmdExitError):
+  pass
+
+class NoExitArgumentParser(argparse.ArgumentParser):
+  def exit(self, status=0, message=None):
+    if message:
+        self._print_message(message, sys.stderr)
+    raise ArgparseExitError(status, message)
+
+class CommandHandler:
+  _argv: Optional[Sequence[str]]
+  _parser: argparse.ArgumentParser
+  _args: argparse.Namespace
+  _cwd: str
+  _config_file: Optional[str] = None
+  _scan_parent_dirs: bool = True
+  _erase_db: bool = False
+  _passphrase: Optional[str] = None
+  _raw_stdout: TextIO = sys.stdout
+  _raw_stderr: TextIO = sys.stderr
+  _colorize_stdout: bool = False
+  _colorize_stderr: bool = False
+  _compact: bool = False
+  _raw: bool = False
+  _encoding: str
+  _output_file: Optional[str] = None
+
+  _parser_cache: ClassVar[Dict[str, argparse.ArgumentParser]] = {}
+  """Built parser trees, keyed by the subcommand they include ('' for all).
+     Parsers hold no per-invocation state, so repeated runs in one process
+     (tests, REPLs) skip parser construction entirely."""
+
+  def __init__(self, argv: Optional[Sequence[str]]=None):
+    self._argv = argv
+
+  def ocolor(self, codes: str) -> str:
+    return codes if self._colorize_stdout else ""
+
+  def ecolor(self, codes: str) -> str:
+    return codes if self._colorize_stderr else ""
+
+  def abspath(self, path: str) -> str:
+    return _abspath(self._cwd, path)
+
+  # cached_property rather than a None-check accessor: after the first access
+  # these are plain instance-dict lookups. An explicit --config value is
+  # applied by run() before any of them is first accessed.
+  @cached_property
+  def config_file(self) -> str:
+    if not self._config_file is None:
+      return self._config_file
+    from secret_kv import locate_kv_store_config_file
+    return locate_kv_store_config_file(config_path=self._cwd, scan_parent_dirs=self._scan_parent_dirs)
+
+  @cached_property
+  def store_config(self) -> 'KvStoreConfig':
+    from secret_kv import load_kv_store_config
+    return load_kv_store_config(config_path=self.config_file)
+
+  @cached_property
+  def kv_store(self) -> 'KvStore':
+    return self.store_config.open_store(erase=self._erase_db, passphrase=self._passphrase)
+
+
+  def pretty_print(
+        self, any_value: Union['XJsonable', 'KvValue'],
+        compact: Optional[bool]=None,
+        colorize: Optional[bool]=None,
+        raw: Optional[bool]=None,
+        simple_json: bool=False
+      ):
+    from secret_kv import KvValue
+    from secret_kv.value import (
+        validate_simple_jsonable,
+        xjson_decode_simple_jsonable,
+        xjson_encode_simple_jsonable,
+      )
+    if isinstance(any_value, KvValue):
+      kv: KvValue = any_value
+    else:
+      if simple_json:
+        kv = KvValue(xjson_encode_simple_jsonable(validate_simple_jsonable(any_value)))
+      else:
+        kv = KvValue(any_value)
+    value: 'Jsonable' = kv.json_data
+    xvalue: 'XJsonable' = kv.data
+
+    if raw is None:
+      raw = self._raw
+    if raw:
+      if isinstance(xvalue, str):
+        self._raw_stdout.write(xvalue)
+        return
+      elif isinstance(xvalue, (bytes, bytearray)):
+        # write the already-contiguous bytes straight to the fd; fdopen would
+        # allocate a fresh buffered writer (and an fstat) per call
+        self._raw_stdout.flush()
+        fd = self._raw_stdout.fileno()
+        mv = memoryview(xvalue)
+        pos = 0
+        while pos < len(mv):
+          pos += os.write(fd, mv[pos:])
+        return
+
+    if simple_json:
+      value = xjson_decode_simple_jsonable(value)
+
+    if compact is None:
+      compact = self._compact
+    if colorize is None:
+      colorize = True
+
+    def emit_to(f: TextIO):
+      final_colorize = colorize and ((f is sys.stdout and self._colorize_stdout) or (f is sys.stderr and self._colorize_stderr))
+
+      if not final_colorize:
+        data = _dumps(value, compact=compact, newline=True).encode(getattr(f, 'encoding', None) or 'utf-8')
+        buffer = getattr(f, 'buffer', None)
+        if buffer is not None:
+          # One bytes write through the raw buffer instead of two text writes;
+          # skips the text wrapper's per-write encode and lock round trips
+          f.flush()
+          buffer.write(data)
+          buffer.flush()
+        else:
+          f.write(data.decode(getattr(f, 'encoding', None) or 'utf-8'))
+      else:
+        f.write(_colorize_json(_dumps(value, compact=compact)))
+        f.write('\n')
+
+    output_file = self._output_file
+    if output_file is None:
+      emit_to(sys.stdout)
+    else:
+      # File output is never colorized, so serialize once and write the bytes
+      # through a raw fd — no text wrapper, no buffered-io layer. 0o600 keeps
+      # the exported secret readable by the owner only.
+      data = _dumps(value, compact=compact, newline=True).encode(self._encoding)
+      fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+      try:
+        mv = memoryview(data)
+        pos = 0
+        while pos < len(mv):
+          pos += os.write(fd, mv[pos:])
+      finally:
+        os.close(fd)
+
+
+  def cmd_bare(self) -> int:
+    print("A command is required", file=sys.stderr)
+    return 1
+
+  def cmd_clear_database(self) -> int:
+    self._erase_db = True
+    kv = self.kv_store
+    print(f"{kv} successfully cleared.", file=sys.stderr)
+    return 0
+
+  def cmd_delete_store(self) -> int:
+    from secret_kv import delete_kv_store
+    config_file = self.config_file
+    store_desc = delete_kv_store(config_file, scan_parent_dirs=False)
+    print(f"secret-cv store with config at '{store_desc}' successfully deleted.", file=sys.stderr)
+    return 0
+
+  def cmd_test(self) -> int:
+    return 0
+
+  def cmd_create_store(self) -> int:
+    from secret_kv import create_kv_store
+    args = self._args
+    parent_dir = self.abspath(args.parent_dir)
+    passphrase: Optional[str] = args.passphrase
+
+    db = create_kv_store(parent_dir, passphrase=passphrase)
+
+    print(f"Successfully created .secret-kv store under {parent_dir}", file=sys.stderr)
+    return 0
+
+  def cmd_del(self) -> int:
+    args = self._args
+    key: str = args.key
+    store = self.kv_store
+    if not store.has_key(key):
+      raise KeyError(f"del: key \"{key}\" does not exist")
+    store.delete_value(key)
+    return 0
+
+  def cmd_get(self) -> int:
+    args = self._args
+    simple_json: bool = args.simple_json
+    key: str = args.key
+    store = self.kv_store
+    kv = store.get_value(key)
+    if kv is None:
+      raise KeyError(f"get: key \"{key}\" does not exist")
+    self.pretty_print(kv, simple_json=simple_json)
+    return 0
+
+  def cmd_get_tag(self) -> int:
+    args = self._args
+    simple_json: bool = args.simple_json
+    key: str = args.key
+    tag_name: str = args.tag_name
+    store = self.kv_store
+    kv = store.get_tag(key, tag_name)
+    if kv is None:
+      raise KeyError(f"get-tag: key \"{key}\", tag \"{tag_name}\" does not exist")
+    self.pretty_print(kv, simple_json=simple_json)
+    return 0
+
+  def cmd_keys(self) -> int:
+    store = self.kv_store
+    keys = list(store.keys())
+    self.pretty_print(keys)
+    return 0
+
+  def _set_helper(self, cmd_name: str="set") -> 'KvValue':
+    from base64 import b64decode
+    from secret_kv import KvValue
+    args = self._args
+    encoding: str = args.text_encoding
+    value_s: Optional[str] = args.value
+    value_type_s: Optional[str] = args.value_type
+
+    if value_type_s is None:
+      value_type_s = 'str'
+    use_stdin: bool = args.use_stdin
+    input_file: Optional[str] = args.input_file
+    if use_stdin:
+      if input_file is None:
+        input_file = '-'
+      else:
+        raise ValueError(f"{cmd_name}: Conflicting value input sources, --stdin and \"{input_file}\"")
+    value: 'XJsonable'
+    if input_file is None:
+      if value_s is None:
+        raise ValueError("{cmd_name}: One of <value>, --stdin, or --input <filename> must be provided.")
+      if value_type_s == 'binary':
+        value = value_s.encode(encoding)
+      else:
+        value = value_s
+    else:
+      if not value_s is None:
+        raise ValueError("{cmd_name}: <value> must be omitted if -i, --input, or --stdin is provided.")
+      if input_file in ( '-', '/dev/stdin' ):
+        # Read stdin through its raw buffer: one read, no buffered-io layer,
+        # and no text-codec pass unless the value type actually needs text
+        raw = sys.stdin.buffer.read()
+        value = raw if value_type_s in ( 'binary', 'base64' ) else raw.decode(encoding)
+      elif value_type_s in ( 'binary', 'base64' ):
+        with open(input_file, 'rb', buffering=0) as bf:
+          size = os.fstat(bf.fileno()).st_size
+          if size > 0:
+            # Read straight into one preallocated buffer rather than letting
+            # read() repeatedly grow and copy an internal bytes object
+            buf = bytearray(size)
+            view = memoryview(buf)
+            pos = 0
+            while pos < size:
+              n = bf.readinto(view[pos:])
+              if n == 0:
+                break
+              pos += n
+            tail = bf.read()  # in case the file grew since fstat
+            if pos < size or tail:
+              value = bytes(view[:pos]) + (tail or b'')
+            else:
+              value = bytes(buf)
+          else:
+            # size is unknown for pipes and other special files
+            value = bf.read()
+      else:
+        with open(input_file, 'r', encoding=encoding) as f:
+          value = f.read()
+
+    if value_type_s == 'base64':
+      try:
+        # b64decode re-encodes str input internally through the general codec
+        # machinery; hand it ascii bytes directly (file/stdin input already is)
+        if isinstance(value, str):
+          value = value.encode('ascii')
+        value = b64decode(value, validate=True)
+      except Exception as ex:
+        raise ValueError(f"{cmd_name}: Invalid base-64 encoded string: {ex}") from ex
+      value_type_s = 'binary'
+
+    coercer_entry = _COERCERS.get(value_type_s)
+    if not coercer_entry is None:
+      coercer, err_desc = coercer_entry
+      try:
+        value = coercer(value)
+      except ValueError as ex:
+        raise ValueError(f"{cmd_name}: {err_desc}: {ex}") from ex
+    # 'str' and 'binary' pass through unchanged
+
+    kv = KvValue(value)
+
+    return kv
+
+  def cmd_set(self) -> int:
+    args = self._args
+    key: str = args.key
+    clear_tags: bool = args.clear_tags
+    kv = self._set_helper("set")
+    tags: Dict[str, 'KvValue'] = {}
+    
+    store = self.kv_store
+    store.set_value_and_tags(key, kv, tags, clear_tags=clear_tags)
+
+    return 0
+
+  def _iter_set_many_records(self, lines):
+    from base64 import b64decode
+    from secret_kv.value import xjson_decode, xjson_encode_simple_jsonable
+    for lineno, line in enumerate(lines, start=1):
+      line = line.strip()
+      if not line:
+        continue
+      # If the line contains no '@xjson_type' markers (escaped keys contain the
+      # marker as a substring), xjson_decode is the identity on freshly parsed
+      # JSON and the per-record tree walks can be skipped entirely.
+      plain_json = not '@xjson_type' in line
+      try:
+        rec = _loads(line)
+      except ValueError as ex:
+        raise ValueError(f"set-many: line {lineno}: Invalid JSON record: {ex}") from ex
+      if not isinstance(rec, dict) or not isinstance(rec.get('key'), str):
+        raise ValueError(f"set-many: line {lineno}: Each record must be a JSON object with a string \"key\" property")
+      key: str = rec['key']
+      raw_value = rec.get('value')
+      vtype = rec.get('type')
+      value: 'XJsonable'
+      if vtype is None or vtype == 'xjson':
+        value = raw_value if plain_json else xjson_decode(raw_value)
+      elif vtype == 'json':
+        value = raw_value if plain_json else xjson_decode(xjson_encode_simple_jsonable(raw_value))
+      elif vtype in ( 'str', 'base64' ) or vtype in _COERCERS:
+        if not isinstance(raw_value, str):
+          raise ValueError(f"set-many: line {lineno}: type \"{vtype}\" requires a string value")
+        if vtype == 'str':
+          value = raw_value
+        elif vtype == 'base64':
+          try:
+            value = b64decode(raw_value.encode('ascii'), validate=True)
+          except Exception as ex:
+            raise ValueError(f"set-many: line {lineno}: Invalid base-64 encoded string: {ex}") from ex
+        else:
+          coercer, err_desc = _COERCERS[vtype]
+          try:
+            value = coercer(raw_value)
+          except ValueError as ex:
+            raise ValueError(f"set-many: line {lineno}: {err_desc}: {ex}") from ex
+      else:
+        raise ValueError(f"set-many: line {lineno}: Unknown value type \"{vtype}\"")
+      raw_tags = rec.get('tags')
+      if raw_tags is None:
+        tags: Dict[str, 'XJsonable'] = {}
+      elif isinstance(raw_tags, dict):
+        if plain_json:
+          tags = raw_tags
+        else:
+          tags = dict((tag_name, xjson_decode(tag_data)) for tag_name, tag_data in raw_tags.items())
+      else:
+        raise ValueError(f"set-many: line {lineno}: \"tags\" must be a JSON object if present")
+      yield key, value, tags
+
+  def cmd_set_many(self) -> int:
+    args = self._args
+    clear_tags: bool = args.clear_tags
+    input_file: Optional[str] = args.input_file
+    if args.use_stdin and not input_file is None:
+      raise ValueError(f"set-many: Conflicting value input sources, --stdin and \"{input_file}\"")
+    store = self.kv_store
+    if input_file is None or input_file == '-':
+      store.set_values_and_tags(self._iter_set_many_records(sys.stdin), clear_tags=clear_tags)
+    else:
+      with open(input_file, 'r', encoding=self._encoding) as f:
+        store.set_values_and_tags(self._iter_set_many_records(f), clear_tags=clear_tags)
+    return 0
+
+  def cmd_set_tag(self) -> int:
+    args = self._args
+    key: str = args.key
+    tag_name: str = args.tag_name
+    kv = self._set_helper("set")
+    
+    store = self.kv_store
+    store.set_tag(key, tag_name, kv)
+
+    return 0
+
+  def cmd_set_default_passphrase(self) -> int:
+    from secret_kv import get_kv_store_passphrase, set_kv_store_default_passphrase
+    args = self._args
+    passphrase: Optional[str] = args.new_passphrase
+    if passphrase is None:
+      passphrase = self._passphrase
+    if passphrase is None:
+      try:
+        config_file = self.config_file
+        passphrase = get_kv_store_passphrase(config_file)
+      except Exception:
+        pass
+    if passphrase is None:
+      raise RuntimeError("A passphrase must be supplied as an arg (or with -p or --passphrase); e.g., 'secret-kv set-default-passphrase <my-passphrase>'")
+    set_kv_store_default_passphrase(passphrase)
+    return 0
+
+  def cmd_get_default_passphrase(self) -> int:
+    from secret_kv import get_kv_store_default_passphrase
+    passphrase = get_kv_store_default_passphrase()
+    self.pretty_print(passphrase)
+    return 0
+
+  def cmd_reset_passphrase(self) -> int:
+    from secret_kv import set_kv_store_passphrase
+    args = self._args
+    passphrase: Optional[str] = args.new_passphrase
+    if passphrase is None:
+      passphrase = self._passphrase
+    if passphrase is None:
+      raise RuntimeError("A passphrase must be supplied as an arg (or with -p or --passphrase); e.g., 'secret-kv reset-passphrase <my-passphrase>'")
+    config_file = self.config_file
+    set_kv_store_passphrase(config_file, passphrase)
+    return 0
+
+  def cmd_update_passphrase(self) -> int:
+    from secret_kv import set_kv_store_passphrase
+    args = self._args
+    new_passphrase: str = args.new_passphrase
+    config_file = self.config_file
+    store = self.kv_store
+    store.update_passphrase(new_passphrase)
+    # NOTE: A failure here could leave DB and keychain out of sync
+    set_kv_store_passphrase(config_file, new_passphrase)
+    return 0
+
+  def cmd_get_passphrase(self) -> int:
+    from secret_kv import get_kv_store_passphrase
+    config_file = self.config_file
+    passphrase = get_kv_store_passphrase(config_file)
+    self.pretty_print(passphrase)
+    return 0
+
+  def cmd_version(self) -> int:
+    from secret_kv import __version__ as pkg_version
+    self.pretty_print(pkg_version)
+    return 0
+
+  _GLOBAL_OPTS_WITH_VALUE = frozenset([
+      '-o', '--output', '--text-encoding', '-C', '--cwd', '--config', '-p', '--passphrase' ])
+  """Top-level options that consume a following value token. Used when prescanning
+     the commandline for the subcommand name."""
+
+  @classmethod
+  def _scan_subcommand(cls, argv: Sequence[str]) -> Optional[str]:
+    """Best-effort prescan of the commandline for the subcommand token, skipping
+       top-level options and their values. Returns None if no subcommand is found."""
+    it = iter(argv)
+    for arg in it:
+      if arg == '--':
+        return next(it, None)
+      if arg.startswith('-') and arg != '-':
+        if arg in cls._GLOBAL_OPTS_WITH_VALUE:
+          next(it, None)
+        continue
+      return arg
+    return None
+
+  # ======================= version
+
+  def _add_version_parser(self, subparsers) -> None:
+    parser_version = subparsers.add_parser('version',
+                            description='''Display version information. JSON-quoted string. If a raw string is desired, user -r.''')
+    parser_version.set_defaults(func=CommandHandler.cmd_version)
+
+  # ======================= test
+
+  def _add_test_parser(self, subparsers) -> None:
+    parser_test = subparsers.add_parser('test', description="Run a simple test. For debugging only.  Will be removed.")
+    parser_test.set_defaults(func=CommandHandler.cmd_test)
+
+  # ======================= create-store
+
+  def _add_create_store_parser(self, subparsers) -> None:
+    parser_create = subparsers.add_parser('create-store', description="Create a new secret key-value store")
+    parser_create.add_argument('parent_dir',
+                        help='The parent directory under which a ".secret-kv" subdirectory will be created')
+    parser_create.set_defaults(func=CommandHandler.cmd_create_store)
+
+  # ======================= delete-store
+
+  def _add_delete_store_parser(self, subparsers) -> None:
+    parser_delete_store = subparsers.add_parser('delete-store', description="Deletes the secret-kv store, including database, config, and .secret-kv directory")
+    parser_delete_store.set_defaults(func=CommandHandler.cmd_delete_store)
+
+  # ======================= clear-database
+
+  def _add_clear_database_parser(self, subparsers) -> None:
+    parser_clear_database = subparsers.add_parser('clear-database', description="Erases all content in the database without deleting it")
+    parser_clear_database.set_defaults(func=CommandHandler.cmd_clear_database)
+
+  def _add_set_arguments(self, parser_set) -> None:
+    # one dest shared by -t and its shortcut flags; argparse enforces the
+    # mutual exclusion, so no per-flag conflict checks are needed downstream
+    vtype_group = parser_set.add_mutually_exclusive_group()
+    vtype_group.add_argument('-t', '--type', dest='value_type', default=None,
+                        choices= [ 'str', 'int', 'float', 'bool', 'json', 'base64', 'binary', 'xjson' ],
+                        help='''Specify how the provided input for the value is interpreted. Default is "str". "base64"
+                                will decode a base64 string into a binary value. "xjson" will accept JSON with special
+                                interpretation of "@xjson-type" properties''')
+    for flag_args, vtype in _VTYPE_FLAGS:
+      vtype_group.add_argument(*flag_args, dest='value_type', action='store_const', const=vtype,
+                        help=f'short for --type={vtype}')
+    parser_set.add_argument('--stdin', dest="use_stdin", action='store_true', default=False,
+                        help='Read the value from stdin instead of the commandline')
+    parser_set.add_argument('-i', '--input', dest="input_file", default=None,
+                        help='Read the value from the specified file instead of the commandline')
+
+  # ======================= set
+
+  def _add_set_parser(self, subparsers) -> None:
+    parser_set = subparsers.add_parser('set', description="Set the value associated with a key")
+    parser_set.add_argument('key',
+                        help='The key name for which a value is being set')
+    parser_set.add_argument('value', nargs='?', default=None,
+                        help='The value to assign to the key. By default, interpreted as a string value. See options for interpretaton.')
+    self._add_set_arguments(parser_set)
+    parser_set.add_argument('--clear-tags', action='store_true', default=False,
+                        help='Clear all previously existing tags for the key')
+    parser_set.set_defaults(func=CommandHandler.cmd_set)
+
+  # ======================= set-many
+
+  def _add_set_many_parser(self, subparsers) -> None:
+    parser_set_many = subparsers.add_parser('set-many',
+                        description='''Set the values and tags for multiple keys in one store transaction.
+                                       Input is newline-delimited JSON, one record per line:
+                                       {"key": "<name>", "value": <data>, "type": "<type>", "tags": {...}}.
+                                       "type" and "tags" are optional; "type" defaults to "xjson".''')
+    parser_set_many.add_argument('--stdin', dest="use_stdin", action='store_true', default=False,
+                        help='Read records from stdin (the default if -i is not provided)')
+    parser_set_many.add_argument('-i', '--input', dest="input_file", default=None,
+                        help='Read records from the specified file instead of stdin')
+    parser_set_many.add_argument('--clear-tags', action='store_true', default=False,
+                        help='Clear all previously existing tags for each key being set')
+    parser_set_many.set_defaults(func=CommandHandler.cmd_set_many)
+
+  # ======================= set-tag
+
+  def _add_set_tag_parser(self, subparsers) -> None:
+    parser_set_tag = subparsers.add_parser('set-tag', description="Set the value associated with a named tag on a particular key")
+    parser_set_tag.add_argument('key',
+                        help='The key name for which a tag value is being set')
+    parser_set_tag.add_argument('tag_name',
+                        help='The tag name for which a tag value is being set')
+    parser_set_tag.add_argument('value', nargs='?', default=None,
+                        help='The value to assign to the tag. By default, interpreted as a string value. See options for interpretaton.')
+    self._add_set_arguments(parser_set_tag)
+    parser_set_tag.set_defaults(func=CommandHandler.cmd_set_tag)
+
+  # ======================= get
+
+  def _add_get_parser(self, subparsers) -> None:
+    parser_get = subparsers.add_parser('get', description="Get the value associated with a key")
+    parser_get.add_argument('key',
+                        help='The key name for which the value is being fetched')
+    parser_get.add_argument('-j', '--simple-json', action='store_true', default=False,
+                        help='''Outputs the value as simple JSON with no special escaping of "@xjson_type" properties.
+                                Will fail with error if the value is not simple JSON.''')
+    parser_get.add_argument('--with-tags', action='store_true', default=False,
+                        help='Outputs a JSON dict with a "value" property and a "tags" property. overrides --raw')
+    parser_get.set_defaults(func=CommandHandler.cmd_get)
+
+  # ======================= get_tag
+
+  def _add_get_tag_parser(self, subparsers) -> None:
+    parser_get_tag = subparsers.add_parser('get-tag', description="Get the value associated with a named tag on a particular key")
+    parser_get_tag.add_argument('key',
+                        help='The key name for which a tag value is being fetched')
+    parser_get_tag.add_argument('tag_name',
+                        help='The tag name for which a tag value is being fetched')
+    parser_get_tag.add_argument('-j', '--simple-json', action='store_true', default=False,
+                        help='''Outputs the tag value as simple JSON with no special escaping of "@xjson_type" properties.
+                                Will fail with error if the value is not simple JSON.''')
+    parser_get_tag.set_defaults(func=CommandHandler.cmd_get_tag)
+
+  # ======================= del
+
+  def _add_del_parser(self, subparsers) -> None:
+    parser_del = subparsers.add_parser('del', description="Delete the value and all tags associated with a key")
+    parser_del.add_argument('key',
+                        help='The key name for which the value and tags should be deleted')
+    parser_del.set_defaults(func=CommandHandler.cmd_del)
+
+  # ======================= keys
+
+  def _add_keys_parser(self, subparsers) -> None:
+    parser_keys = subparsers.add_parser('keys', description="Get a list of the keys in the store")
+    parser_keys.set_defaults(func=CommandHandler.cmd_keys)
+
+  # ======================= set-default-passphrase
+
+  def _add_set_default_passphrase_parser(self, subparsers) -> None:
+    parser_set_default_passphrase = subparsers.add_parser('set-default-passphrase',
+                        description='''Set the default passphrase for newly created stores.''')
+    parser_set_default_passphrase.add_argument('new_passphrase', nargs='?', default=None,
+                        help='''The new store passphrase to be saved in the keychain. If
+                                not provided, the passphrase provided with -p, or the
+                                passphrase associated with the current store will be used.''')
+    parser_set_default_passphrase.set_defaults(func=CommandHandler.cmd_set_default_passphrase)
+
+  # ======================= get-default-passphrase
+
+  def _add_get_default_passphrase_parser(self, subparsers) -> None:
+    parser_get_default_passphrase = subparsers.add_parser('get-default-passphrase',
+                        description='''Get the default passphrase for newly created stores.
+                                       In JSON quoted string format by default; use -r for raw string.''')
+    parser_get_default_passphrase.set_defaults(func=CommandHandler.cmd_get_default_passphrase)
+
+  # ======================= reset-passphrase
+
+  def _add_reset_passphrase_parser(self, subparsers) -> None:
+    parser_reset_passphrase = subparsers.add_parser('reset-passphrase',
+                        description='''Hard reset the passphrase saved in keyring for the store.
+                                       Does *not* update the actual passphrase with which the store is encrypted.
+                                       The new passphrase can be provided with -p or as a positional argument.
+                                       This command is useful when the keyring entry is lost and must be reset.''')
+    parser_reset_passphrase.add_argument('new_passphrase', nargs='?', default=None,
+                        help='The new store passphrase to be saved in the keychain.')
+    parser_reset_passphrase.set_defaults(func=CommandHandler.cmd_reset_passphrase)
+
+  # ======================= update-passphrase
+
+  def _add_update_passphrase_parser(self, subparsers) -> None:
+    parser_update_passphrase = subparsers.add_parser('update-passphrase',
+                        description='''Re-encrypt the store with a new passphrase, and update the passphrase saved in keyring.
+                                       Requires the previous passphrase to be saved in keyring or provided with -p.
+                                       This update is not transactional, and a failure during update may leave the database
+                                       and keyring in inconsistent states.''')
+    parser_update_passphrase.add_argument('new_passphrase',
+                        help='The new passphrase for the store.')
+    parser_update_passphrase.set_defaults(func=CommandHandler.cmd_update_passphrase)
+
+  # ======================= get-passphrase
+
+  def _add_get_passphrase_parser(self, subparsers) -> None:
+    parser_get_passphrase = subparsers.add_parser('get-passphrase',
+                        description='''Get the passphrase used to access the store, as saved in keyring.
+                                       In JSON quoted string format by default; use -r for raw string.''')
+    parser_get_passphrase.set_defaults(func=CommandHandler.cmd_get_passphrase)
+
+  # =========================================================
+
+  _SUBCOMMAND_BUILDERS = {
+      'version': _add_version_parser,
+      'test': _add_test_parser,
+      'create-store': _add_create_store_parser,
+      'delete-store': _add_delete_store_parser,
+      'clear-database': _add_clear_database_parser,
+      'set': _add_set_parser,
+      'set-many': _add_set_many_parser,
+      'set-tag': _add_set_tag_parser,
+      'get': _add_get_parser,
+      'get-tag': _add_get_tag_parser,
+      'del': _add_del_parser,
+      'keys': _add_keys_parser,
+      'set-default-passphrase': _add_set_default_passphrase_parser,
+      'get-default-passphrase': _add_get_default_passphrase_parser,
+      'reset-passphrase': _add_reset_passphrase_parser,
+      'update-passphrase': _add_update_passphrase_parser,
+      'get-passphrase': _add_get_passphrase_parser,
+    }
+  """Maps each subcommand name to the builder that attaches its subparser. Only
+     the subparser for the invoked subcommand is built on a normal run."""
+
+  def run(self) -> int:
+    """Run the secret-kv command-line tool with provided arguments
+
+    Args:
+        argv (Optional[Sequence[str]], optional):
+            A list of commandline arguments (NOT including the program as argv[0]!),
+            or None to use sys.argv[1:]. Defaults to None.
+
+    Returns:
+        int: The exit code that would be returned if this were run as a standalone command.
+    """
+    argv = self._argv if self._argv is not None else sys.argv[1:]
+
+    # Fast path: print the version without building the argparse tree at all
+    if argv and argv[0] in ( '--version', '-V' ):
+      from secret_kv import __version__ as pkg_version
+      print(pkg_version)
+      return 0
+
+    builders = self._SUBCOMMAND_BUILDERS
+    subcmd = self._scan_subcommand(argv)
+    cache_key = subcmd if subcmd in builders else ''
+    parser = CommandHandler._parser_cache.get(cache_key)
+    if parser is None:
+      parser = self._build_parser(cache_key)
+      CommandHandler._parser_cache[cache_key] = parser
+    self._parser = parser
+
+    if '_ARGCOMPLETE' in os.environ:
+      # argcomplete only does anything when invoked by its shell hook, which
+      # sets _ARGCOMPLETE; skip the import entirely on ordinary invocations.
+      import argcomplete # type: ignore[import]
+      argcomplete.autocomplete(parser)
+    try:
+      args = parser.parse_args(argv)
+    except ArgparseExitError as ex:
+      return ex.exit_code
+    traceback: bool = args.traceback
+    try:
+      self._args = args
+      self._raw_stdout = sys.stdout
+      self._raw_stderr = sys.stderr
+      self._raw = args.raw
+      self._compact = args.compact
+      self._output_file = args.output_file
+      self._encoding = args.text_encoding
+      monochrome: bool = args.monochrome
+      if not monochrome:
+        self._colorize_stdout = is_colorizable(sys.stdout)
+        self._colorize_stderr = is_colorizable(sys.stderr)
+        if (self._colorize_stdout or self._colorize_stderr) and sys.platform == 'win32':
+          # ANSI sequences pass through natively on POSIX terminals; the
+          # AnsiToWin32 filter is only needed (and only pays its per-write
+          # Python-level cost) on Windows consoles
+          import colorama # type: ignore[import]
+          colorama.init(wrap=False)
+          if self._colorize_stdout:
+            sys.stdout = colorama.AnsiToWin32(sys.stdout)
+          if self._colorize_stderr:
+            sys.stderr = colorama.AnsiToWin32(sys.stderr)
+      self._cwd = os.path.abspath(os.path.expanduser(args.cwd))
+      self._passphrase = args.passphrase
+      config_file: Optional[str] = args.config
+      if not config_file is None:
+        self._config_file = self.abspath(config_file)
+      rc = args.func(self)
+    except Exception as ex:
+      if isinstance(ex, CmdExitError):
+        rc = ex.exit_code
+      else:
+        rc = 1
+      if rc != 0:
+        if traceback:
+          raise
+
+        if self._colorize_stderr:
+          from colorama import Fore, Style
+          print(f"{Fore.RED}secret-kv: error: {ex}{Style.RESET_ALL}", file=sys.stderr)
+        else:
+          print(f"secret-kv: error: {ex}", file=sys.stderr)
+    return rc
+
+  def _build_parser(self, cache_key: str) -> argparse.ArgumentParser:
+    """Constructs the argparse tree, attaching only the subparser named by
+       cache_key, or all subparsers if cache_key is ''. The result is stateless
+       (command funcs are unbound) and is cached in _parser_cache."""
+    parser = argparse.ArgumentParser(description="Access a secret key/value database.")
+
+    # ======================= Main command
+
+    parser.add_argument('--traceback', "--tb", action='store_true', default=False,
+                        help='Display detailed exception information')
+    parser.add_argument('-M', '--monochrome', action='store_true', default=False,
+                        help='Output to stdout/stderr in monochrome. Default is to colorize if stream is a compatible terminal')
+    parser.add_argument('-c', '--compact', action='store_true', default=False,
+                        help='Compact instead of pretty-printed output')
+    parser.add_argument('-r', '--raw', action='store_true', default=False,
+                        help='''Output raw strings and binary content directly, not json-encoded.
+                                Values embedded in structured results are not affected.''')
+    parser.add_argument('-o', '--output', dest="output_file", default=None,
+                        help='Write output value to the specified file instead of stdout')
+    parser.add_argument('--text-encoding', default='utf-8',
+                        help='The encoding used for text. Default  is utf-8')
+    parser.add_argument('-C', '--cwd', default='.',
+                        help="Change the effective directory used to search for configuration")
+    parser.add_argument('--config',
+                        help="Specify the location of the config file")
+    parser.add_argument('-p', '--passphrase', default=None,
+                        help='''The passphrase to be used for accessing the store. By default, the
+                                passphrase saved in the keyring will be used, or the global
+                                default secret-kv passphrase (in the keyring) will be used for new stores''')
+    parser.set_defaults(func=CommandHandler.cmd_bare)
+
+    subparsers = parser.add_subparsers(
+                        title='Commands',
+                        description='Valid commands',
+                        help='Additional help available with "<command-name> -h"')
+
+    builders = self._SUBCOMMAND_BUILDERS
+    if cache_key in builders:
+      builders[cache_key](self, subparsers)
+    else:
+      # No recognizable subcommand (e.g., bare "-h" or a typo); build every
+      # subparser so that help and error output can list all commands.
+      for builder in builders.values():
+        builder(self, subparsers)
+    return parser
+
+def run(argv: Optional[Sequence[str]]=None) -> int:
+  try:
+    rc = CommandHandler(argv).run()
+  except CmdExitError as ex:
+    rc = ex.exit_code
+  return rc
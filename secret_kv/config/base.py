@@ -12,18 +12,19 @@ from ..internal_types import Jsonable, JsonableDict, Nothing, NothingType, Jsona
 
 
 import os
-import json
-import hashlib
 import importlib
 
-from ..util import full_name_of_type
-from .context import ConfigContext
+from ..util import full_name_of_type, hash_pathname as g_hash_pathname
+from .context import ConfigContext, _loads, _resolve_class
 
 _T = TypeVar('_T')
 
 class Config:
   _template_json_data: Optional[JsonableDict] = None
   _json_data: Optional[JsonableDict] = None
+  _props: Optional[JsonableDict] = None
+  """Same dict as _json_data when it is a dict, validated once at render time
+     so property getters skip the per-call isinstance check."""
   _context: Optional[ConfigContext] = None
 
   def __init__(self):
@@ -33,23 +34,26 @@ class Config:
     result = self._context
     assert not result is None
     return result
+
+  def __getstate__(self) -> Dict[str, Any]:
+    """Pickled state excludes the ConfigContext and everything rendered from
+       it: the context embeds a snapshot of the entire process environment
+       (env: template variables), which must never be persisted, and the
+       rendered data would be stale under a different environment. Consumers
+       must call render_and_bake with a fresh context after unpickling."""
+    state = dict(self.__dict__)
+    for key in ('_context', '_json_data', '_props'):
+      state.pop(key, None)
+    return state
     
-  @classmethod  
+  @classmethod
   def hash_pathname(cls, pathname: str) -> str:
-    result = hashlib.sha1(os.path.abspath(os.path.expanduser(pathname)).encode("utf-8")).hexdigest()
-    return result
+    return g_hash_pathname(pathname)
 
   @classmethod
   def instantiate_config(cls, class_name: str) -> 'Config':
-    class_parts = class_name.rsplit('.', 1)
-    if len(class_parts) > 1:
-      module_name, class_tail = class_parts
-    else:
-      import secret_kv.config as config_module
-      module_name = config_module.__name__
-      class_tail = class_name
-    module = importlib.import_module(module_name)
-    klass = getattr(module, class_tail)
+    import secret_kv.config as config_module
+    klass = _resolve_class(class_name, config_module.__name__)
     if not issubclass(klass, Config):
       raise RuntimeError(f"Config: {full_name_of_type(klass)} is not a subclass of {full_name_of_type(Config)}")
     cfg  = klass()
@@ -84,6 +88,7 @@ class Config:
 
   def render(self):
     self._json_data = self._context.render_template_json_data(self._template_json_data)
+    self._props = self._json_data if isinstance(self._json_data, dict) else None
 
   def render_and_bake(self, context: ConfigContext):
     self._context = context.clone()
@@ -95,7 +100,17 @@ class Config:
         ctx: ConfigContext,
         config_text: str
       ):
-    self._template_json_data = json.loads(config_text)
+    self.load_parsed(ctx, _loads(config_text))
+
+  def load_parsed(
+        self,
+        ctx: ConfigContext,
+        json_data: JsonableDict
+      ):
+    """Loads this Config from already-parsed JSON data, without the
+       serialize/reparse round trip of load_json_data. The caller must not
+       modify json_data afterward."""
+    self._template_json_data = json_data
     self.render_and_bake(ctx)
 
   def load_json_data(
@@ -103,8 +118,7 @@ class Config:
         ctx: ConfigContext,
         json_data: JsonableDict
       ):
-    config_text = json.dumps(json_data)
-    self.loads(ctx, config_text)
+    self.load_parsed(ctx, json_data)
 
   _no_default = object()
 
@@ -131,9 +145,9 @@ class Config:
   def get_cfg_property(self, key: str) -> Jsonable: pass
 
   def get_cfg_property(self, key: str, default = _no_default):
-    if not isinstance(self._json_data, dict):
+    if self._props is None:
       raise TypeError(f"Config: Expected config data {key} to be dict, got {type(self._json_data)}")
-    result = self._json_data.get(key, default)
+    result = self._props.get(key, default)
     if result is self._no_default:
       raise KeyError("Config: Property {key} does not exist and has no default")
     if not result is None and not isinstance(result, JsonableTypes):
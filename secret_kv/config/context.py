@@ -5,24 +5,83 @@
 
 """Configuration context."""
 
-from tty import CFLAG
-from typing import Optional, Dict, Any, TYPE_CHECKING, TextIO, Type, TypeVar, overload
+from typing import Optional, Dict, Any, Mapping, TYPE_CHECKING, TextIO, Tuple, Type, TypeVar, overload
 
-from ..util import full_name_of_type, full_type, hash_pathname as g_hash_pathname
+from ..util import full_name_of_type, full_type, hash_pathname as g_hash_pathname, norm_path
 from ..internal_types import Jsonable, JsonableDict
+from ..version import __version__ as _MY_VERSION_S
 
 if TYPE_CHECKING:
   from .base import Config
 
 import os
+import sys
 import json
-from collections import UserDict
-from copy import copy, deepcopy
-from string import Template
+from copy import copy
+import re
 import importlib
 import hashlib
 
-class ConfigDict(UserDict):
+_ENV_SNAPSHOT: Dict[str, str] = dict((f"env:{k}", v) for k, v in os.environ.items())
+"""os.environ with keys prefixed "env:", snapshotted at import (or the last
+   ConfigContext.refresh_env()) so each context creation is a dict update
+   rather than a per-variable f-string loop."""
+
+_MY_VERSION: Tuple[int, ...] = tuple(int(x) for x in _MY_VERSION_S.split('.'))
+"""This package's version, pre-split for config version comparisons."""
+
+_class_cache: Dict[Tuple[str, str], type] = {}
+"""Resolved config classes, keyed by (class_name, default_module_name)."""
+
+def _resolve_class(class_name: str, default_module_name: str) -> type:
+  """Resolves a possibly module-qualified class name to a class object.
+
+  Unqualified names are looked up in default_module_name. Results are
+  cached so repeated config instantiation skips the import machinery;
+  already-imported modules are fetched from sys.modules without taking
+  the import lock."""
+  key = (class_name, default_module_name)
+  klass = _class_cache.get(key)
+  if klass is None:
+    class_parts = class_name.rsplit('.', 1)
+    module_name: str
+    if len(class_parts) > 1:
+      module_name, class_tail = class_parts
+    else:
+      module_name = default_module_name
+      class_tail = class_name
+    module = sys.modules.get(module_name)
+    if module is None:
+      module = importlib.import_module(module_name)
+    klass = getattr(module, class_tail)
+    _class_cache[key] = klass
+  return klass
+
+_TEMPLATE_RE = re.compile(r'\$(?:(\$)|([_a-z][_a-z0-9]*)|\{([_a-z][_a-z0-9]*)\}|())', re.IGNORECASE | re.ASCII)
+"""Matches the same "$$", "$var" and "${var}" placeholders as string.Template;
+   the empty fourth group catches a dangling "$". Precompiled once so each
+   substitution is a single pattern.sub rather than a Template construction."""
+
+def _substitute(text: str, mapping: Mapping[str, Any]) -> str:
+  def repl(m: 're.Match') -> str:
+    if not m.group(1) is None:
+      return '$'
+    name = m.group(2) or m.group(3)
+    if name is None:
+      raise ValueError(f"Invalid placeholder at position {m.start()} in string: {text!r}")
+    return str(mapping[name])
+  return _TEMPLATE_RE.sub(repl, text)
+
+# NOTE: config text is parsed with stdlib json for consistency with the value
+# codec: orjson would silently turn integer literals beyond 64 bits into lossy
+# floats and reject NaN/Infinity, narrowing what a config file may contain.
+_loads = json.loads
+_dumps = json.dumps
+
+class ConfigDict(dict):
+  # A plain dict subclass: UserDict proxies every item access through a
+  # Python-level __getitem__, which template substitution pays per variable
+  # lookup.
   pass
 
   # _T = TypeVar('_T', bound='ConfigDict')
@@ -35,21 +94,36 @@ class ConfigContext(ConfigDict):
   def __init__(self, globals: Optional[Dict[str, Any]]=None, os_environ: Optional[Dict[str, str]]=None):
     super().__init__()
     if not globals is None:
-      globals = deepcopy(globals)
       self.update(globals)
     if os_environ is None:
-      # NOTE: not thread safe if anyone is calling setvar
-      os_environ = dict(os.environ)
-    for k, v in os_environ.items():
-      self[f"env:{k}"] = v
+      # NOTE: not thread safe if anyone is calling setvar; callers that mutate
+      # os.environ should call ConfigContext.refresh_env() first
+      self.update(_ENV_SNAPSHOT)
+    else:
+      for k, v in os_environ.items():
+        self[f"env:{k}"] = v
+
+  @classmethod
+  def refresh_env(cls) -> None:
+    """Rebuilds the shared os.environ snapshot used by __init__; call after
+       mutating os.environ."""
+    global _ENV_SNAPSHOT
+    _ENV_SNAPSHOT = dict((f"env:{k}", v) for k, v in os.environ.items())
 
   def clone(self) -> 'ConfigContext':
-    result = deepcopy(self)
+    # Entries are immutable scalars (env strings and template vars), so a
+    # shallow item copy is enough for the clone to be mutated independently;
+    # deepcopy would walk and pickle-reduce every leaf.
+    result = type(self).__new__(type(self))
+    dict.update(result, self)
+    result.__dict__.update(self.__dict__)
     return result
 
   def render_template_str(self, template_str: str) -> str:
-    t: Template = Template(template_str)
-    result: str = t.substitute(self)
+    if not '$' in template_str:
+      # Most config strings contain no placeholders; skip the regex entirely
+      return template_str
+    result: str = _substitute(template_str, self)
     return result
 
   def render_template_json_data(
@@ -58,10 +132,20 @@ class ConfigContext(ConfigDict):
         *args,
         **kwargs
       ) -> Jsonable:
-    template_str = json.dumps(template_json_data)
-    json_text: str = self.render_template_str(template_str)
-    result: Jsonable = json.loads(json_text)
-    return result
+    # Walk the already-parsed JSON tree and substitute into string leaves (and
+    # dict keys) directly, rather than serializing the whole tree, substituting
+    # into the JSON text, and reparsing. Non-string scalars are passed through
+    # untouched, and substituted values can never corrupt surrounding JSON syntax.
+    return self._render_node(template_json_data)
+
+  def _render_node(self, node: Jsonable) -> Jsonable:
+    if isinstance(node, str):
+      return self.render_template_str(node)
+    if isinstance(node, dict):
+      return dict((self._render_node(k), self._render_node(v)) for k, v in node.items())
+    if isinstance(node, list):
+      return [ self._render_node(v) for v in node ]
+    return node
 
   _Config=TypeVar('_Config', bound='Config')
   @overload
@@ -73,16 +157,8 @@ class ConfigContext(ConfigDict):
     if required_type is None:
       required_type = Config
     assert issubclass(required_type, Config)
-    class_parts = class_name.rsplit('.', 1)
-    module_name: str
-    if len(class_parts) > 1:
-      module_name, class_tail = class_parts
-    else:
-      from .. import config as config_module
-      module_name = config_module.__name__
-      class_tail = class_name
-    module = importlib.import_module(module_name)
-    klass = getattr(module, class_tail)
+    from .. import config as config_module
+    klass = _resolve_class(class_name, config_module.__name__)
     if not issubclass(klass, required_type):
       raise RuntimeError(f"Config: {full_name_of_type(klass)} is not a subclass of required type {full_name_of_type(required_type)}")
     assert issubclass(klass, Config)
@@ -108,7 +184,7 @@ class ConfigContext(ConfigDict):
         if propname in self:
           del self[propname]
     else:
-      config_file = os.path.abspath(os.path.expanduser(config_file))
+      config_file = norm_path(config_file)
       config_dir = os.path.dirname(config_file)
       config_file_hash = self.hash_pathname(config_file)
       config_dir_hash = self.hash_pathname(config_dir)
@@ -134,7 +210,13 @@ class ConfigContext(ConfigDict):
   @overload
   def loads(self, s: str, required_type: Optional[Type[_Config]]) -> _Config: ...
   def loads(self, s: str, required_type: Optional[Type['Config']]=None) -> 'Config':
-    data: Jsonable = json.loads(s)
+    return self.load_parsed_data(_loads(s), required_type=required_type)
+
+  @overload
+  def load_parsed_data(self, data: Jsonable) -> 'Config': ...
+  @overload
+  def load_parsed_data(self, data: Jsonable, required_type: Optional[Type[_Config]]) -> _Config: ...
+  def load_parsed_data(self, data: Jsonable, required_type: Optional[Type['Config']]=None) -> 'Config':
     ctx = self
 
     if not isinstance(data, dict):
@@ -144,10 +226,8 @@ class ConfigContext(ConfigDict):
       if not isinstance(version_s, str):
         raise ValueError(f"ConfigContext: expected str version, got {full_type(version_s)}")
       version = tuple(int(x) for x in version_s.split('.'))
-      from .. import __version__ as my_version_s
-      my_version = tuple(int(x) for x in my_version_s.split('.'))
-      if version > my_version:
-        raise RuntimeError(f"ConfigContext: configuration version {version_s} is newer than ConfigContext version {my_version_s}")
+      if version > _MY_VERSION:
+        raise RuntimeError(f"ConfigContext: configuration version {version_s} is newer than ConfigContext version {_MY_VERSION_S}")
     cfg_class_name = data['cfg_class']
     if not isinstance(cfg_class_name, str):
       raise ValueError(f"ConfigContext: expected str cfg_class, got {full_type(cfg_class_name)}")
@@ -158,7 +238,7 @@ class ConfigContext(ConfigDict):
     if isinstance(cfg_data, str):
       cfg.loads(ctx, cfg_data)
     else:
-      cfg.load_json_data(ctx, cfg_data)
+      cfg.load_parsed(ctx, cfg_data)
     return cfg
 
   @overload
@@ -166,9 +246,7 @@ class ConfigContext(ConfigDict):
   @overload
   def load_json_data(self, data: Jsonable, required_type: Optional[Type[_Config]]) -> _Config: ...
   def load_json_data(self, data: Jsonable, required_type: Optional[Type['Config']]=None) -> 'Config':
-    s = json.dumps(data)
-    cfg = self.loads(s, required_type=required_type)
-    return cfg
+    return self.load_parsed_data(data, required_type=required_type)
 
   @overload
   def load_stream(self, stream: TextIO) -> 'Config': ...
@@ -8,8 +8,6 @@
 from typing import Optional
 from ..internal_types import JsonableDict
 
-import keyring
-
 from ..util import full_name_of_type
 from .base import Config
 from .passphrase import PassphraseConfig
@@ -29,6 +27,11 @@ class KeyringPassphraseConfig(PassphraseConfig):
   def get_passphrase(self) -> str:
     assert not self._keyring_service is None
     assert not self._keyring_key is None
+    result = self._cached_passphrase
+    if not result is None:
+      return result
+    # deferred import: keyring enumerates backend entry points at import time
+    import keyring
     result = keyring.get_password(self._keyring_service, self._keyring_key)
     if result is None:
       if self._default_passphrase_cfg is None:
@@ -39,14 +42,19 @@ class KeyringPassphraseConfig(PassphraseConfig):
         except KeyError as e:
           raise KeyError(f"KeyringPassphraseConfig: service '{self._keyring_service}', key name '{self._keyring_key}' does not exist") from e
 
+    self._cached_passphrase = result
     return result
 
   def set_passphrase(self, s: str):
+    import keyring
     assert not self._keyring_service is None
     assert not self._keyring_key is None
     keyring.set_password(self._keyring_service, self._keyring_key, s)
+    self._cached_passphrase = s
 
   def delete_passphrase(self):
+    import keyring
     assert not self._keyring_service is None
     assert not self._keyring_key is None
+    self.invalidate_passphrase_cache()
     keyring.delete_password(self._keyring_service, self._keyring_key)
@@ -8,19 +8,26 @@
 from typing import Optional, Dict, TextIO
 from ..internal_types import JsonableDict
 
-import keyring
-
 from ..util import full_name_of_type, full_type
 from .base import Config
 
 class PassphraseConfig(Config):
   _default_passphrase_cfg: Optional['PassphraseConfig'] = None
+  _cached_passphrase: Optional[str] = None
+  """The last passphrase fetched by this instance, so open/create/retry flows
+     pay any backend round-trip (e.g., keyring IPC) only once."""
 
   def bake(self):
     default_cfg_data = self.get_template_cfg_property('default_passphrase_cfg', None)
     if not default_cfg_data is None:
       self._default_passphrase_cfg = self._context.load_json_data(default_cfg_data)
 
+  def __getstate__(self):
+    # never let a fetched passphrase leak into pickled state
+    state = super().__getstate__()
+    state.pop('_cached_passphrase', None)
+    return state
+
   def get_passphrase(self) -> str:
     raise NotImplementedError(f"{full_type(self)} does not implement get_passphrase")
 
@@ -30,6 +37,9 @@ class PassphraseConfig(Config):
   def delete_passphrase(self):
     raise NotImplementedError(f"{full_type(self)} does not implement delete_passphrase")
 
+  def invalidate_passphrase_cache(self):
+    self._cached_passphrase = None
+
   def passphrase_exists(self) -> bool:
     try:
       self.get_passphrase()
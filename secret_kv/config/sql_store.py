@@ -39,7 +39,10 @@ class SqlKvStoreConfig(KvStoreConfig):
       if not create:
         raise FileNotFoundError(f"SqlKvStoreConfig: Database file does not exist: {file_name}")
 
-    db: SqlConnection = sqlcipher3.connect(file_name)
+    # A larger statement cache keeps every hot query (all module-level
+    # constants in sql_store, so their text is stable) prepared across calls,
+    # avoiding SQL reparses for the life of the connection.
+    db: SqlConnection = sqlcipher3.connect(file_name, cached_statements=256)
     store = SqlKvStore(store_name=file_name, db=db, passphrase=passphrase)
     store.init_db()
     return store
@@ -10,11 +10,22 @@
    have rich value types.
 """
 from genericpath import isfile
-from typing import Optional, overload, TypeVar, Type
+from typing import Dict, Optional, Tuple, overload, TypeVar, Type
+from functools import lru_cache
 
 import os
-import keyring
+import stat
 import json
+
+# orjson serializes faster than stdlib json (including indented output); fall
+# back to stdlib if it is not installed.
+try:
+  import orjson
+  def _dumps_pretty_bytes(data) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+except ImportError:
+  def _dumps_pretty_bytes(data) -> bytes:
+    return json.dumps(data, indent=2, sort_keys=True).encode('utf-8')
 from .config.store import KvStoreConfig
 from .store import KvStore
 from .util import full_type
@@ -42,50 +53,79 @@ def get_kv_store_passphrase_keyring_service() -> str:
 def get_kv_store_default_passphrase_keyring_key() -> str:
   return SECRET_KV_KEYRING_KEY_DEFAULT_PASSPHRASE
 
+@lru_cache(maxsize=256)
 def get_kv_store_passphrase_keyring_key(config_filename: str) -> str:
   file_hash = hash_pathname(config_filename)
   result = SECRET_KV_KEYRING_KEY_FHASH_PASSPHRASE_PREFIX + file_hash + SECRET_KV_KEYRING_KEY_FHASH_PASSPHRASE_SUFFFIX
   return result
 
+_passphrase_cache: Dict[Tuple[str, str], str] = {}
+"""Process-lifetime cache of keyring passphrase lookups, keyed by
+   (service, key). Keyring backends can involve an IPC round trip per
+   get_password call; the setters below keep the cache coherent for
+   changes made within this process. Disabled by SECRET_KV_NO_CACHE."""
+
 def get_kv_store_default_passphrase() -> str:
   service = get_kv_store_passphrase_keyring_service()
   key = get_kv_store_default_passphrase_keyring_key()
+  if not os.environ.get('SECRET_KV_NO_CACHE'):
+    cached = _passphrase_cache.get((service, key))
+    if not cached is None:
+      return cached
+  # deferred import: keyring enumerates backend entry points at import time
+  import keyring
   result = keyring.get_password(service, key)
   if result is None:
     raise KvNoPassphraseError(f"get_kv_store_default_passphrase: no default passphrase set at keyring service '{service}', key name '{key}'")
+  _passphrase_cache[(service, key)] = result
   return result
 
 def set_kv_store_default_passphrase(passphrase: str):
+  import keyring
   service = get_kv_store_passphrase_keyring_service()
   key = get_kv_store_default_passphrase_keyring_key()
   keyring.set_password(service, key, passphrase)
+  _passphrase_cache[(service, key)] = passphrase
 
 def get_kv_store_passphrase(config_file: str) -> str:
   service = get_kv_store_passphrase_keyring_service()
   key = get_kv_store_passphrase_keyring_key(config_file)
+  if not os.environ.get('SECRET_KV_NO_CACHE'):
+    cached = _passphrase_cache.get((service, key))
+    if not cached is None:
+      return cached
+  import keyring
   result = keyring.get_password(service, key)
   if result is None:
     try:
       result = get_kv_store_default_passphrase()
     except KeyError as e:
       raise KvNoPassphraseError(f"get_kv_store_passphrase: No passphrase set for config file '{config_file}' at keyring service '{service}', key name '{key}'") from e
+  else:
+    _passphrase_cache[(service, key)] = result
   return result
 
 def set_kv_store_passphrase(config_file: str, passphrase: str):
+  import keyring
   service = get_kv_store_passphrase_keyring_service()
   key = get_kv_store_passphrase_keyring_key(config_file)
   keyring.set_password(service, key, passphrase)
+  _passphrase_cache[(service, key)] = passphrase
 
 def create_kv_store(
       parent_dir: str,
       passphrase: Optional[str]=None
     ) -> KvStore:
   abs_parent_dir = os.path.abspath(os.path.expanduser(parent_dir))
-  if not os.path.isdir(abs_parent_dir):
-    raise FileNotFoundError(f"create_kv_store: No such directory: '{parent_dir}'")
   db_dir = os.path.join(abs_parent_dir, SECRET_KV_DIR_NAME)
-  if os.path.exists(db_dir):
-    raise FileExistsError(f"create_kv_store: path already exists: '{db_dir}'")
+  # Optimistic creation: mkdir atomically detects both a missing parent and a
+  # preexisting db_dir, replacing the isdir/exists stats that preceded it
+  try:
+    os.mkdir(db_dir)
+  except FileExistsError:
+    raise FileExistsError(f"create_kv_store: path already exists: '{db_dir}'") from None
+  except (FileNotFoundError, NotADirectoryError):
+    raise FileNotFoundError(f"create_kv_store: No such directory: '{parent_dir}'") from None
   db_filename = os.path.join(db_dir, SECRET_KV_DB_FILENAME)
   config_filename = os.path.join(db_dir, SECRET_KV_CONFIG_FILENAME)
   final_passphrase = passphrase
@@ -93,6 +133,8 @@ def create_kv_store(
     try:
       final_passphrase = get_kv_store_default_passphrase()
     except KeyError as ex:
+      # don't leave the empty db_dir behind on failure
+      os.rmdir(db_dir)
       raise KvNoPassphraseError(
         "A passphrase must be provided at store creation, or a default passphrase can be set with \"secret-kv passphrase set --default\"") from ex
   else:
@@ -120,33 +162,52 @@ def create_kv_store(
             }
         }    
     }
-  cfg_text = json.dumps(cfg_data, indent=2, sort_keys=True)
-  os.mkdir(db_dir)
-  with open(config_filename, 'w') as f:
-    print(cfg_text, file=f)
+  cfg_bytes = _dumps_pretty_bytes(cfg_data) + b'\n'
+  # O_EXCL ensures we never clobber an existing config, and 0o600 keeps the
+  # secret-adjacent file private from creation; one os.write avoids text-mode
+  # encoding and buffering.
+  fd = os.open(config_filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+  try:
+    os.write(fd, cfg_bytes)
+  finally:
+    os.close(fd)
   set_kv_store_passphrase(config_filename, final_passphrase)
   cfg = ConfigContext().load_file(config_filename, required_type=KvStoreConfig)
   db = cfg.open_store(create_only=True)
   return db
 
-def locate_kv_store_config_file(config_path: Optional[str]=None, scan_parent_dirs: bool=True) -> str:
-  if config_path is None:
-    config_path = '.'
-  test_path = os.path.abspath(os.path.expanduser(config_path))
-  if not os.path.exists(test_path):
-      raise FileNotFoundError(f"secret-kv: Config file not found: '{config_path}'")
-  if os.path.isdir(test_path):
-    tail_1 = SECRET_KV_CONFIG_FILENAME
+@lru_cache(maxsize=128)
+def _locate_kv_store_config_file_cached(test_path: str, scan_parent_dirs: bool) -> str:
+  config_path = test_path
+  # A single stat classifies the path; exists/isdir/isfile would each repeat
+  # the syscall
+  try:
+    st = os.stat(test_path)
+  except FileNotFoundError:
+    raise FileNotFoundError(f"secret-kv: Config file not found: '{config_path}'") from None
+  if stat.S_ISDIR(st.st_mode):
     tail_2 = os.path.join(SECRET_KV_DIR_NAME, SECRET_KV_CONFIG_FILENAME)
     while True:
-      p = os.path.join(test_path, tail_1)
-      if os.path.isfile(p):
-        result = p
-        break
-      p = os.path.join(test_path, tail_2)
-      if os.path.isfile(p):
-        result = p
+      # One scandir per directory level finds both candidates, instead of a
+      # stat for each; DirEntry.is_file usually answers from dirent type info
+      # without another syscall.
+      entries: Dict[str, os.DirEntry] = {}
+      try:
+        with os.scandir(test_path) as it:
+          for entry in it:
+            if entry.name == SECRET_KV_CONFIG_FILENAME or entry.name == SECRET_KV_DIR_NAME:
+              entries[entry.name] = entry
+      except OSError:
+        pass
+      entry = entries.get(SECRET_KV_CONFIG_FILENAME)
+      if not entry is None and entry.is_file():
+        result = os.path.join(test_path, SECRET_KV_CONFIG_FILENAME)
         break
+      if SECRET_KV_DIR_NAME in entries:
+        p = os.path.join(test_path, tail_2)
+        if os.path.isfile(p):
+          result = p
+          break
       old_dir = test_path
       test_path = os.path.dirname(test_path)
       if not scan_parent_dirs or old_dir == test_path:
@@ -154,12 +215,23 @@ def locate_kv_store_config_file(config_path: Optional[str]=None, scan_parent_dir
           raise FileNotFoundError(f"secret-kv: Config file not found in dir or parent dirs: '{config_path}'")
         else:
           raise FileNotFoundError(f"secret-kv: Config file not found in dir: '{config_path}'")
-  elif os.path.isfile(test_path):
+  elif stat.S_ISREG(st.st_mode):
     result = test_path
   else:
     raise FileNotFoundError(f"secret-kv: Config file path not directory or file: '{config_path}'")
   return result
 
+def locate_kv_store_config_file(config_path: Optional[str]=None, scan_parent_dirs: bool=True) -> str:
+  if config_path is None:
+    config_path = '.'
+  # Normalize before consulting the cache so relative and absolute spellings
+  # of the same directory share a cache entry
+  test_path = os.path.abspath(os.path.expanduser(config_path))
+  return _locate_kv_store_config_file_cached(test_path, scan_parent_dirs)
+
+# for tests and long-lived processes that mutate the filesystem:
+locate_kv_store_config_file.cache_clear = _locate_kv_store_config_file_cached.cache_clear # type: ignore[attr-defined]
+
 _Config=TypeVar('_Config', bound=Config)
 @overload
 def load_any_config_file(config_file: str) -> Config: ...
@@ -169,13 +241,81 @@ def load_any_config_file(config_file: str, required_type: Type[Config]=Config) -
   cfg = ConfigContext().load_file(config_file, required_type=required_type)
   return cfg
 
-def load_kv_store_config(config_path: Optional[str]=None, scan_parent_dirs: bool=True) -> KvStoreConfig:
-  config_file = locate_kv_store_config_file(config_path=config_path, scan_parent_dirs=scan_parent_dirs)
+MAX_CACHEABLE_CONFIG_SIZE = 1_000_000
+"""Config files larger than this are never cached on disk"""
+
+def _config_cache_file(config_file: str, config_bytes: bytes) -> str:
+  """Returns the pathname of the on-disk cache entry for a parsed config file.
+
+     The filename embeds a digest of both the config file's pathname and its raw
+     content, so a modified or relocated config file automatically misses the cache.
+  """
+  import hashlib
+  h = hashlib.blake2b(config_file.encode('utf-8') + b'\0' + config_bytes, digest_size=16).hexdigest()
+  return os.path.join(os.path.expanduser('~'), '.cache', 'secret-kv', f"cfg-{h}.pkl")
+
+def _load_kv_store_config_file(config_file: str) -> KvStoreConfig:
   cfg = load_any_config_file(config_file)
   if not isinstance(cfg, KvStoreConfig):
     raise TypeError(f"secret-kv: Config file '{config_file}' (type {full_type(cfg)}) is not the expected KvStoreConfig")
   return cfg
 
+_kv_store_config_cache: Dict[str, Tuple[int, KvStoreConfig]] = {}
+"""Process-lifetime cache of parsed KvStoreConfigs, keyed by config file path
+   and guarded by the file's mtime_ns; avoids re-reading and re-parsing the
+   config on every call in long-lived processes (tests, REPLs)."""
+
+def load_kv_store_config(config_path: Optional[str]=None, scan_parent_dirs: bool=True) -> KvStoreConfig:
+  config_file = locate_kv_store_config_file(config_path=config_path, scan_parent_dirs=scan_parent_dirs)
+  if os.environ.get('SECRET_KV_NO_CACHE'):
+    return _load_kv_store_config_file(config_file)
+  try:
+    mtime_ns = os.stat(config_file).st_mtime_ns
+  except OSError:
+    mtime_ns = None
+  if not mtime_ns is None:
+    cached_entry = _kv_store_config_cache.get(config_file)
+    if not cached_entry is None and cached_entry[0] == mtime_ns:
+      return cached_entry[1]
+  try:
+    with open(config_file, 'rb') as f:
+      config_bytes = f.read(MAX_CACHEABLE_CONFIG_SIZE + 1)
+  except OSError:
+    return _load_kv_store_config_file(config_file)
+  if len(config_bytes) > MAX_CACHEABLE_CONFIG_SIZE:
+    return _load_kv_store_config_file(config_file)
+  import pickle
+  cache_file = _config_cache_file(config_file, config_bytes)
+  try:
+    with open(cache_file, 'rb') as f:
+      cached = pickle.load(f)
+    if isinstance(cached, KvStoreConfig):
+      # Pickled state deliberately carries only the parsed template (no
+      # ConfigContext, which holds an environment snapshot); re-render with a
+      # fresh context so env: template variables reflect the current
+      # environment.
+      cached.render_and_bake(ConfigContext().push_config_file(config_file))
+      if not mtime_ns is None:
+        _kv_store_config_cache[config_file] = (mtime_ns, cached)
+      return cached
+  except Exception:
+    pass
+  cfg = _load_kv_store_config_file(config_file)
+  if not mtime_ns is None:
+    _kv_store_config_cache[config_file] = (mtime_ns, cfg)
+  try:
+    cache_dir = os.path.dirname(cache_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = cache_file + f".tmp.{os.getpid()}"
+    with open(tmp_file, 'wb') as f:
+      pickle.dump(cfg, f)
+    os.chmod(tmp_file, 0o600)
+    os.replace(tmp_file, cache_file)
+  except Exception:
+    # caching is best-effort; fall back to the freshly parsed config
+    pass
+  return cfg
+
 def open_kv_store(
       config_path: Optional[str]=None,
       scan_parent_dirs: bool=True,
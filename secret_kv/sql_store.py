@@ -2,27 +2,148 @@ from typing import Optional, Union, Tuple, Dict, TypeVar, Any, List, Iterable, M
 from .internal_types import JsonableDict, Jsonable, SqlConnection, XJsonableDict, XJsonable
 
 import json
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import groupby
 
 from .store import KvStore
-from .value import KvValue, xjson_decode
+from .value import KvValue
 from .exceptions import KvBadPassphraseError, KvError, KvReadOnlyError, KvNoEnumerationError
 
 from sqlite3 import Cursor
 from sqlite3.dbapi2 import DatabaseError
 
+# NOTE: stored json_text must be parsed with stdlib json, not orjson: orjson
+# silently parses integers beyond 64 bits as lossy floats and rejects the
+# NaN/Infinity literals stdlib emits, corrupting or breaking values already
+# persisted by stdlib-json builds.
+_json_loads = json.loads
+
+# Query text used by the hot paths, hoisted to module constants so each call
+# binds an existing str object instead of rebuilding the literal, and so the
+# statements are easy to audit in one place. One-time DDL stays inline.
+_SQL_GET_KEY_ID = '''SELECT kv_key_id FROM kv_key WHERE kv_key.key_name = ?'''
+_SQL_GET_KEY_ID_AND_VALUE_ID = '''SELECT kv_key_id, kv_value_id FROM kv_key WHERE kv_key.key_name = ?'''
+_SQL_GET_KEY_ID_AND_VALUE = '''SELECT kv_key_id, kv_type, json_text FROM kv_key INNER JOIN kv_value on kv_key.kv_value_id = kv_value.kv_value_id WHERE kv_key.key_name = ?'''
+_SQL_GET_TAG_ID_AND_VALUE_ID = '''SELECT kv_tag_id, kv_value_id FROM kv_tag WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ?'''
+_SQL_GET_TAG = '''SELECT kv_type, json_text FROM kv_tag INNER JOIN kv_value on kv_tag.kv_value_id = kv_value.kv_value_id WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ?'''
+_SQL_HAS_TAG = '''SELECT COUNT(*) FROM kv_tag WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ?'''
+_SQL_GET_TAG_NAMES = '''SELECT tag_name from kv_tag WHERE kv_tag.kv_key_id = ?'''
+_SQL_GET_TAGS_AS_ITEMS = '''SELECT tag_name, kv_type, json_text FROM kv_tag INNER JOIN kv_value on kv_tag.kv_value_id = kv_value.kv_value_id WHERE kv_tag.kv_key_id = ?'''
+_SQL_DELETE_TAG_VALUES_FOR_KEY = '''DELETE FROM kv_value
+      WHERE EXISTS (
+          SELECT * from kv_tag
+            WHERE kv_tag.kv_key_id = ? AND kv_tag.kv_value_id = kv_value.kv_value_id
+        );
+'''
+_SQL_DELETE_TAG_VALUE = '''DELETE FROM kv_value
+      WHERE EXISTS (
+          SELECT * from kv_tag
+            WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ? AND kv_tag.kv_value_id = kv_value.kv_value_id
+        );
+'''
+_SQL_INSERT_VALUE = '''INSERT INTO kv_value (kv_type, json_text) VALUES (?,?)'''
+_SQL_DELETE_VALUE_BY_ID = '''DELETE from kv_value WHERE kv_value_id = ?'''
+_SQL_UPSERT_TAG = '''INSERT INTO kv_tag (tag_name, kv_key_id, kv_value_id ) VALUES(?, ?, ?)
+      ON CONFLICT(kv_key_id, tag_name) DO UPDATE SET kv_value_id = excluded.kv_value_id
+      RETURNING kv_tag_id'''
+_SQL_UPSERT_TAG_BATCH = '''INSERT INTO kv_tag (tag_name, kv_key_id, kv_value_id ) VALUES(?, ?, ?)
+      ON CONFLICT(kv_key_id, tag_name) DO UPDATE SET kv_value_id = excluded.kv_value_id'''
+"""Same upsert as _SQL_UPSERT_TAG but without RETURNING, which executemany
+   does not support."""
+_SQL_UPSERT_KEY = '''INSERT INTO kv_key (key_name, kv_value_id ) VALUES(?, ?)
+      ON CONFLICT(key_name) DO UPDATE SET kv_value_id = excluded.kv_value_id
+      RETURNING kv_key_id'''
+_SQL_DELETE_KEY_VALUE = '''DELETE FROM kv_value
+      WHERE EXISTS (
+          SELECT * from kv_key
+            WHERE kv_key.kv_key_id = ? AND kv_key.kv_value_id = kv_value.kv_value_id
+        );
+'''
+_SQL_ITER_KEYS = '''SELECT key_name FROM kv_key'''
+_SQL_ITER_ITEMS = '''SELECT key_name, kv_type, json_text FROM kv_key INNER JOIN kv_value on kv_key.kv_value_id = kv_value.kv_value_id'''
+_SQL_ITEMS_WITH_TAGS = '''SELECT k.kv_key_id, k.key_name, kv.kv_type, kv.json_text,
+                t.tag_name, tv.kv_type, tv.json_text
+           FROM kv_key k
+           INNER JOIN kv_value kv ON k.kv_value_id = kv.kv_value_id
+           LEFT JOIN kv_tag t ON t.kv_key_id = k.kv_key_id
+           LEFT JOIN kv_value tv ON t.kv_value_id = tv.kv_value_id
+           ORDER BY k.kv_key_id'''
+_SQL_CLEAR_VALUES = '''DELETE FROM kv_value'''
+_SQL_HAS_KEY = '''SELECT COUNT(*) FROM kv_key WHERE kv_key.key_name = ?'''
+_SQL_COUNT_TAGS = '''SELECT COUNT(*) FROM kv_tag WHERE kv_key_id = ?'''
+_SQL_COUNT_KEYS = '''SELECT COUNT(*) FROM kv_key'''
+
+_ID_CACHE_MAX = 4096
+"""Bound on the per-store row-id caches; oldest entries are evicted first."""
+
+_FETCH_BATCH_SIZE = 1000
+"""Rows pulled per fetchmany by the streaming iterators."""
+
+def _decode_kv_value(kv_type: str, json_text: str) -> KvValue:
+  """Decodes one (kv_type, json_text) pair from kv_value into a KvValue."""
+  if kv_type != 'xjson':
+    raise ValueError(f"Unrecognized kv_type in kv_value table: {kv_type}")
+  return KvValue._from_json_data(_json_loads(json_text))
+
+def _iter_rows(cur: Cursor) -> Iterator[Any]:
+  """Yields every row of an executed cursor, fetching _FETCH_BATCH_SIZE rows
+  per driver call instead of one (the cursor's default arraysize)."""
+  cur.arraysize = _FETCH_BATCH_SIZE
+  while True:
+    rows = cur.fetchmany()
+    if not rows:
+      return
+    yield from rows
+
 class SqlKvStore(KvStore):
   _db: Optional[SqlConnection] = None
   _passphrase: Optional[str] = None
   _db_pragmas_initialized: bool = False
   _db_initialized: bool = False
+  _cached_cursor: Optional[Cursor] = None
 
   SCHEMA_VERSION: int = 1
   DB_APP_NAME = "SqlKvStore"
 
-  def __init__(self, store_name: Optional[str]=None, db: Optional[SqlConnection]=None, passphrase: Optional[str]=None):
+  def __init__(
+        self,
+        store_name: Optional[str]=None,
+        db: Optional[SqlConnection]=None,
+        passphrase: Optional[str]=None,
+        journal_mode: str='WAL',
+        synchronous: str='NORMAL',
+        cache_size: int=-65536,
+        mmap_size: int=268435456,
+        temp_store: str='MEMORY',
+      ):
     super().__init__(store_name)
     self._db = db
     self._passphrase = passphrase
+    # Performance pragmas applied by initialize_db_pragmas. The defaults favor
+    # throughput: WAL journaling with synchronous=NORMAL (durable across app
+    # crashes; a power loss can lose the last transactions but not corrupt the
+    # db), a 64MiB page cache, 256MiB of memory-mapped I/O, and in-memory temp
+    # tables. Callers can override any of them.
+    self._journal_mode = journal_mode
+    self._synchronous = synchronous
+    self._cache_size = cache_size
+    self._mmap_size = mmap_size
+    self._temp_store = temp_store
+    # Bounded LRU maps that let write/delete paths skip the preliminary
+    # row-lookup SELECT. Valid because all access is through this connection;
+    # every write path below keeps them coherent.
+    self._key_id_cache: 'OrderedDict[str, Tuple[int, int]]' = OrderedDict()
+    """Maps key name -> (kv_key_id, kv_value_id) for keys known to exist."""
+    self._tag_id_cache: 'OrderedDict[Tuple[int, str], Tuple[int, int]]' = OrderedDict()
+    """Maps (kv_key_id, tag_name) -> (kv_tag_id, kv_value_id) for tags known to exist."""
+
+  @staticmethod
+  def _id_cache_put(cache: OrderedDict, cache_key, ids) -> None:
+    cache[cache_key] = ids
+    cache.move_to_end(cache_key)
+    if len(cache) > _ID_CACHE_MAX:
+      cache.popitem(last=False)
 
   @property
   def db(self) -> Optional[SqlConnection]:
@@ -42,6 +163,47 @@ class SqlKvStore(KvStore):
       self.init_db()
     return db
 
+  def _cursor(self) -> Cursor:
+    """Returns a cursor shared by short queries whose results are fully
+    fetched before the next DB call. Streaming iterators (iter_keys,
+    items_with_tags, ...) must allocate their own cursor with
+    get_db().cursor(), since a caller may interleave other queries while
+    consuming them. Reusing one cursor avoids a Cursor allocation per query.
+    """
+    cur = self._cached_cursor
+    if cur is None:
+      cur = self.get_db().cursor()
+      self._cached_cursor = cur
+      # Snapshot the bound method for hot helpers: Cursor.execute returns the
+      # cursor, so self._execute(sql, params).fetchone() costs one attribute
+      # load instead of the _cursor() call plus two lookups per query.
+      self._execute = cur.execute
+    return cur
+
+  def _execute(self, sql: str, params: Tuple=()) -> Cursor:
+    """Executes a short query on the shared cursor. Shadowed by the cursor's
+    own bound execute once _cursor() has created it; this method only runs
+    before first use."""
+    return self._cursor().execute(sql, params)
+
+  @contextmanager
+  def _write_transaction(self):
+    """Brackets a logical write in an explicit BEGIN IMMEDIATE/COMMIT, rolling
+    back if the body raises. The write lock is taken up front, so reads inside
+    the body are consistent with the subsequent writes."""
+    cur = self._cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+      yield
+    except BaseException:
+      cur.execute("ROLLBACK")
+      # entries added to the id caches inside the failed transaction refer to
+      # rows that no longer exist; drop everything rather than track them
+      self._key_id_cache.clear()
+      self._tag_id_cache.clear()
+      raise
+    cur.execute("COMMIT")
+
   def set_passhrase(self, passphrase: Optional[str]):
     if self._db_pragmas_initialized:
       raise RuntimeError("SqlKvStore: Cannot set passphrase after initialization")
@@ -57,6 +219,17 @@ class SqlKvStore(KvStore):
         escaped_passphrase = self._passphrase.replace("'", "''")
         db.execute(f"PRAGMA key = '{escaped_passphrase}';")
       db.execute('''PRAGMA foreign_keys = ON;''')
+      # NOTE: pragmas do not support parameter binding; these values come from
+      #       constructor arguments, not untrusted input.
+      db.execute(f"PRAGMA journal_mode = {self._journal_mode};")
+      db.execute(f"PRAGMA synchronous = {self._synchronous};")
+      db.execute(f"PRAGMA cache_size = {self._cache_size};")
+      db.execute(f"PRAGMA mmap_size = {self._mmap_size};")
+      db.execute(f"PRAGMA temp_store = {self._temp_store};")
+      # Autocommit mode: the driver no longer auto-BEGINs before DML; write
+      # methods bracket their statements with _write_transaction instead, so
+      # there is exactly one BEGIN IMMEDIATE/COMMIT per logical write.
+      db.isolation_level = None
       self._db_pragmas_initialized = True
 
   def initialize_new_db(self):
@@ -107,6 +280,9 @@ class SqlKvStore(KvStore):
     cur.execute(
       '''CREATE UNIQUE INDEX kv_key_tag ON kv_tag (kv_key_id, tag_name);
       ''')
+    cur.execute(
+      '''CREATE INDEX kv_tag_value ON kv_tag (kv_value_id);
+      ''')
 
     cur.execute(
       '''INSERT INTO dbinfo (dbinfo_id, app, schema_version) VALUES (?,?,?);''',
@@ -142,6 +318,9 @@ class SqlKvStore(KvStore):
           raise RuntimeError(f"{self}: Database schema version {schema_version} is newer than software schema version {self.SCHEMA_VERSION}; upgrade is required")
         if schema_version < self.SCHEMA_VERSION:
           raise RuntimeError(f"{self}: Database schema version {schema_version} is older than software schema version {self.SCHEMA_VERSION}; schema upgrade is not implemented. Delete the database and recreate.")
+        # indexes are not part of the logical schema, so older databases can
+        # safely be brought up to date in place
+        cur.execute('''CREATE INDEX IF NOT EXISTS kv_tag_value ON kv_tag (kv_value_id);''')
       self._db_initialized = True
 
 
@@ -161,13 +340,7 @@ class SqlKvStore(KvStore):
     Returns:
         Optional[int]: The key_id of the key, if it exists, and None otherwise
     """
-    cur = self.get_db().cursor()
-    key_id: Optional[int] = None
-    cur.execute('''SELECT kv_key_id FROM kv_key WHERE kv_key.key_name = ?''', [ key ])
-    row = cur.fetchone()
-    if not row is None:
-      key_id = row[0]
-    return key_id
+    return self._get_key_id_and_value_id(key)[0]
 
   def _get_required_key_id(self, key: str) -> int:
     """Look up the key_id for a named key, and raise KeyError if it does not exist
@@ -184,138 +357,99 @@ class SqlKvStore(KvStore):
     return key_id
 
   def _get_key_id_and_value_id(self, key: str) -> Tuple[Optional[int], Optional[int]]:
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT kv_key_id, kv_value_id FROM kv_key WHERE kv_key.key_name = ?''', [ key ])
-    row = cur.fetchone()
+    cached = self._key_id_cache.get(key)
+    if not cached is None:
+      return cached
+    row = self._execute(_SQL_GET_KEY_ID_AND_VALUE_ID, (key,)).fetchone()
     if row is None:
       key_id: Optional[int] = None
       value_id: Optional[int] = None
     else:
       key_id = row[0]
       value_id = row[1]
+      self._id_cache_put(self._key_id_cache, key, (key_id, value_id))
     return key_id, value_id
 
   def _get_key_id_and_value(self, key: str) -> Tuple[Optional[int], Optional[KvValue]]:
-    cur = self.get_db().cursor()
     key_id: Optional[int] = None
     value: Optional[KvValue] = None
-    cur.execute('''SELECT kv_key_id, kv_type, json_text FROM kv_key INNER JOIN kv_value on kv_key.kv_value_id = kv_value.kv_value_id WHERE kv_key.key_name = ?''', [ key ])
-    row = cur.fetchone()
+    row = self._execute(_SQL_GET_KEY_ID_AND_VALUE, (key,)).fetchone()
     if not row is None:
       key_id = row[0]
-      kv_type: str = row[1]
-      if kv_type != 'xjson':
-        raise ValueError(f"Unrecognized kv_type in kv_value table: {kv_type}")
-      json_text: str = row[2]
-      json_data: Jsonable = json.loads(json_text)
-      xjson_data = xjson_decode(json_data)
-      value = KvValue(xjson_data)
+      value = _decode_kv_value(row[1], row[2])
     return key_id, value
 
   def _get_tag_id_and_value_id(self, key_id: int, tag_name: str) -> Tuple[Optional[int], Optional[int]]:
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT kv_tag_id, kv_value_id FROM kv_tag WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ?''', [ key_id, tag_name ])
-    row = cur.fetchone()
+    cached = self._tag_id_cache.get((key_id, tag_name))
+    if not cached is None:
+      return cached
+    row = self._execute(_SQL_GET_TAG_ID_AND_VALUE_ID, (key_id, tag_name)).fetchone()
     if row is None:
       tag_id: Optional[int] = None
       value_id: Optional[int] = None
     else:
       tag_id = row[0]
       value_id = row[1]
+      self._id_cache_put(self._tag_id_cache, (key_id, tag_name), (tag_id, value_id))
     return tag_id, value_id
 
   def _get_tag(self, key_id: int, tag_name: str) -> Optional[KvValue]:
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT kv_type, json_text FROM kv_tag INNER JOIN kv_value on kv_tag.kv_value_id = kv_value.kv_value_id WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ?''', [ key_id, tag_name ])
-    row = cur.fetchone()
+    row = self._execute(_SQL_GET_TAG, (key_id, tag_name)).fetchone()
     if row is None:
       result: Optional[KvValue] = None
     else:
-      kv_type: str = row[0]
-      if kv_type != 'xjson':
-        raise ValueError(f"Unrecognized kv_type in kv_value table: {kv_type}")
-      json_text: str = row[1]
-      json_data: Jsonable = json.loads(json_text)
-      xjson_data = xjson_decode(json_data)
-      result = KvValue(xjson_data)
+      result = _decode_kv_value(row[0], row[1])
     return result
 
   def _has_tag(self, key_id: int, tag_name: str) -> bool:
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT COUNT(*) FROM kv_tag WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ?''', [ key_id, tag_name ])
-    result = cur.fetchone()[0] > 0
+    result = self._execute(_SQL_HAS_TAG, (key_id, tag_name)).fetchone()[0] > 0
     return result
 
   def _get_tag_names(self, key_id: int) -> Iterable[str]:
     cur = self.get_db().cursor()
-    cur.execute('''SELECT tag_name from kv_tag WHERE kv_tag.kv_key_id = ?''', [ key_id ])
-    for row in cur:
+    cur.execute(_SQL_GET_TAG_NAMES, (key_id,))
+    for row in _iter_rows(cur):
       tag_name: str = row[0]
       yield tag_name
 
   def _get_tags_as_items(self, key_id: int) -> Iterable[Tuple[str, KvValue]]:
     cur = self.get_db().cursor()
-    cur.execute('''SELECT tag_name, kv_type, json_text FROM kv_tag INNER JOIN kv_value on kv_tag.kv_value_id = kv_value.kv_value_id WHERE kv_tag.kv_key_id = ?''', [ key_id ])
-    for row in cur:
-      tag_name: str = row[0]
-      kv_type: str = row[1]
-      if kv_type != 'xjson':
-        raise ValueError(f"Unrecognized kv_type in kv_value table: {kv_type}")
-      json_text: str = row[2]
-      json_data: Jsonable = json.loads(json_text)
-      xjson_data = xjson_decode(json_data)
-      value = KvValue(xjson_data)
-      yield (tag_name, value)
+    cur.execute(_SQL_GET_TAGS_AS_ITEMS, (key_id,))
+    decode = _decode_kv_value
+    for row in _iter_rows(cur):
+      yield (row[0], decode(row[1], row[2]))
 
   def _get_tags(self, key_id: int) -> Dict[str, KvValue]:
     return dict(self._get_tags_as_items(key_id))
 
   def _clear_tags(self, key_id: int):
-    cur = self.get_db().cursor()
-    cur.execute(
-      '''DELETE FROM kv_value
-            WHERE EXISTS (
-                SELECT * from kv_tag
-                  WHERE kv_tag.kv_key_id = ? AND kv_tag.kv_value_id = kv_value.kv_value_id
-              );
-      ''', [ key_id ])
-    # TODO: this may be unnecessary due to CASCADE DELETE
-    cur.execute('''DELETE from kv_tag WHERE kv_key_id = ?''', [ key_id] )
+    for cache_key in [ ck for ck in self._tag_id_cache if ck[0] == key_id ]:
+      del self._tag_id_cache[cache_key]
+    # deleting the tags' values CASCADEs to the kv_tag rows themselves
+    self._execute(_SQL_DELETE_TAG_VALUES_FOR_KEY, (key_id,))
 
   def _delete_tag_and_value_by_id(self, tag_id: int, value_id: int):
-    cur = self.get_db().cursor()
-    cur.execute('''DELETE FROM kv_value WHERE kv_value_id = ?''', [ value_id ])
-    # TODO: this may be unnecessary due to CASCADE DELETE
-    cur.execute('''DELETE from kv_tag WHERE kv_tag_id = ?''', [ tag_id ])
+    # CASCADE deletes the kv_tag row referencing this value
+    self._execute(_SQL_DELETE_VALUE_BY_ID, (value_id,))
 
   def _delete_tag(self, key_id: int, tag_name: str):
-    cur = self.get_db().cursor()
-    cur.execute(
-      '''DELETE FROM kv_value
-            WHERE EXISTS (
-                SELECT * from kv_tag
-                  WHERE kv_tag.kv_key_id = ? AND kv_tag.tag_name = ? AND kv_tag.kv_value_id = kv_value.kv_value_id
-              );
-      ''', [ key_id, tag_name ])
-    # TODO: this may be unnecessary due to CASCADE DELETE
-    cur.execute('''DELETE from kv_tag WHERE kv_key_id = ? AND tag_name = ?''', [ key_id , tag_name])
-
-  def _insert_value(self, value: XJsonable) -> int:
+    self._tag_id_cache.pop((key_id, tag_name), None)
+    # CASCADE deletes the kv_tag row referencing this value
+    self._execute(_SQL_DELETE_TAG_VALUE, (key_id, tag_name))
+
+  def _insert_value(self, value: KvValue) -> int:
     """Inserts a new unreferenced KvValue into kv_value, and returns its kv_value_id
     The caller must create a reference to the returned id within this transaction,
     (either from a tag or a key) or the newly created row will leak.
 
     Args:
-        value (XJsonable): The new value to insert
+        value (KvValue): The new value to insert. Coercion from plain XJsonable
+                         happens once at the public entry points.
 
     Returns:
         int: The kv_value_id of the newly created kv_value record
     """
-    if not isinstance(value, KvValue):
-      value = KvValue(value)
-    cur = self.get_db().cursor()
-    cur.execute('''INSERT INTO kv_value (kv_type, json_text) VALUES (?,?)''', [ "xjson", value.json_text ])
-    return cur.lastrowid
+    return self._execute(_SQL_INSERT_VALUE, ("xjson", value.json_text)).lastrowid
 
   def _delete_value_by_id(self, value_id: int):
     """Deletes a KvValue from kv_value by its id. Because of CASCADE DELETE, this will also
@@ -324,55 +458,72 @@ class SqlKvStore(KvStore):
     Args:
         value_id (int): The value_id of the row containing the value
     """
-    cur = self.get_db().cursor()
-    cur.execute('''DELETE from kv_value WHERE kv_value_id = ?''', [ value_id ])
-    return cur.lastrowid
+    self._execute(_SQL_DELETE_VALUE_BY_ID, (value_id,))
 
-  def _set_tag(self, key_id: int, tag_name: str, value: XJsonable) -> int:
-    if not isinstance(value, KvValue):
-      value = KvValue(value)
+  def _set_tag(self, key_id: int, tag_name: str, value: KvValue) -> int:
+    # internal: value must already be a KvValue
     tag_id, old_value_id = self._get_tag_id_and_value_id(key_id, tag_name)
     value_id = self._insert_value(value)
-    cur = self.get_db().cursor()
-    if tag_id is None:
-      cur.execute('''INSERT INTO kv_tag (tag_name, kv_key_id, kv_value_id ) VALUES(?, ?, ?)''', [ tag_name, key_id, value_id ])
-      tag_id = cur.lastrowid
-    else:
-      assert not old_value_id is None
-      cur.execute('''UPDATE kv_tag SET kv_value_id = ? WHERE kv_tag_id = ?''', [ value_id, tag_id ])
-      # TODO: this may be unnecessary due to CASCADE DELETE
+    # one branch-free statement handles both insert and update (sqlite >= 3.35)
+    tag_id = self._execute(_SQL_UPSERT_TAG, (tag_name, key_id, value_id)).fetchone()[0]
+    if not old_value_id is None:
       self._delete_value_by_id(old_value_id)
+    self._id_cache_put(self._tag_id_cache, (key_id, tag_name), (tag_id, value_id))
     return tag_id
 
   def _set_tags(self, key_id: int, tags: Mapping[str, XJsonable], clear_tags: bool=False):
     if clear_tags:
       self._clear_tags(key_id)
-    for tag_name, value in tags.items():
-      if not isinstance(value, KvValue):
-        value = KvValue(value)
-      self._set_tag(key_id, tag_name, value)
-
-  def _set_key_value(self, key: str, value: XJsonable) -> int:
-    if not isinstance(value, KvValue):
-      value = KvValue(value)
+    if len(tags) < 2:
+      for tag_name, value in tags.items():
+        if not isinstance(value, KvValue):
+          value = KvValue(value)
+        self._set_tag(key_id, tag_name, value)
+      return
+    # Batch path: one executemany for the value inserts and one for the tag
+    # upserts, rather than 3+ statements per tag through _set_tag.
+    tag_names = list(tags.keys())
+    kv_values = [ v if isinstance(v, KvValue) else KvValue(v) for v in tags.values() ]
+    cur = self._cursor()
+    old_value_ids: List[int] = []
+    if not clear_tags:
+      placeholders = ','.join('?' * len(tag_names))
+      cur.execute(
+          f"SELECT kv_value_id FROM kv_tag WHERE kv_key_id = ? AND tag_name IN ({placeholders})",
+          (key_id, *tag_names)
+        )
+      old_value_ids = [ row[0] for row in cur.fetchall() ]
+    cur.executemany(_SQL_INSERT_VALUE, [ ( "xjson", v.json_text ) for v in kv_values ])
+    # The inserts above run back-to-back on this connection inside one
+    # transaction, so the new rowids are the contiguous range ending at
+    # last_insert_rowid(); no RETURNING (which executemany disallows) is
+    # needed. cur.lastrowid is None after executemany, so ask sqlite directly.
+    cur.execute("SELECT last_insert_rowid()")
+    last_value_id: int = cur.fetchone()[0]
+    value_ids = range(last_value_id - len(kv_values) + 1, last_value_id + 1)
+    cur.executemany(_SQL_UPSERT_TAG_BATCH, list(zip(tag_names, [ key_id ] * len(tag_names), value_ids)))
+    for tag_name in tag_names:
+      self._tag_id_cache.pop((key_id, tag_name), None)
+    if len(old_value_ids) > 0:
+      # Delete values orphaned by re-pointed tags only after the upserts, so
+      # CASCADE does not take the tag rows with them.
+      cur.executemany(_SQL_DELETE_VALUE_BY_ID, [ ( value_id, ) for value_id in old_value_ids ])
+
+  def _set_key_value(self, key: str, value: KvValue) -> int:
+    # internal: value must already be a KvValue
     key_id, old_value_id = self._get_key_id_and_value_id(key)
     value_id = self._insert_value(value)
-    cur = self.get_db().cursor()
-    if key_id is None:
-      cur.execute('''INSERT INTO kv_key (key_name, kv_value_id ) VALUES(?, ?)''', [ key, value_id ])
-      key_id = cur.lastrowid
-    else:
-      assert not old_value_id is None
-      cur.execute('''UPDATE kv_key SET kv_value_id = ? WHERE kv_key_id = ?''', [ value_id, key_id ])
-      # TODO: this may be unnecessary due to CASCADE DELETE
+    # one branch-free statement handles both insert and update (sqlite >= 3.35)
+    key_id = self._execute(_SQL_UPSERT_KEY, (key, value_id)).fetchone()[0]
+    if not old_value_id is None:
       self._delete_value_by_id(old_value_id)
+    self._id_cache_put(self._key_id_cache, key, (key_id, value_id))
     return key_id
 
   def get_value_and_tags(self, key: str) -> Tuple[Optional[KvValue], Dict[str, KvValue]]:
     tags: Dict[str, KvValue] = {}
     key_id, value = self._get_key_id_and_value(key)
     if not key_id is None:
-      cur = self.get_db().cursor()
       tags = self._get_tags(key_id)
     return value, tags
 
@@ -383,67 +534,68 @@ class SqlKvStore(KvStore):
   def set_value_and_tags(self, key: str, value: XJsonable, tags: Mapping[str, XJsonable], clear_tags: bool=False):
     if not isinstance(value, KvValue):
       value = KvValue(value)
-    key_id = self._set_key_value(key, value)
-    self._set_tags(key_id, tags, clear_tags=clear_tags)
-    self.get_db().commit()
+    with self._write_transaction():
+      key_id = self._set_key_value(key, value)
+      self._set_tags(key_id, tags, clear_tags=clear_tags)
+
+  def set_values_and_tags(self, items: Iterable[Tuple[str, XJsonable, Mapping[str, XJsonable]]], clear_tags: bool=False):
+    # one transaction for the whole batch, amortizing fsync/journal cost
+    # across all items
+    with self._write_transaction():
+      for key, value, tags in items:
+        if not isinstance(value, KvValue):
+          value = KvValue(value)
+        key_id = self._set_key_value(key, value)
+        self._set_tags(key_id, tags, clear_tags=clear_tags)
 
   def set_value(self, key: str, value: XJsonable):
     if not isinstance(value, KvValue):
       value = KvValue(value)
-    self._set_key_value(key, value)
-    self.get_db().commit()
+    with self._write_transaction():
+      self._set_key_value(key, value)
 
   def delete_value(self, key: str):
-    key_id, value_id = self._get_key_id_and_value_id(key)
-    if key_id is None:
-      raise KeyError(f"{self.store_name}: {json.dumps(key)}")
-    self._clear_tags(key_id)
-    cur = self.get_db().cursor()
-    cur.execute(
-      '''DELETE FROM kv_value
-            WHERE EXISTS (
-                SELECT * from kv_key
-                  WHERE kv_key.kv_key_id = ? AND kv_key.kv_value_id = kv_value.kv_value_id
-              );
-      ''', [ key_id ])
-    # TODO: this may be unnecessary due to CASCADE DELETE
-    cur.execute('''DELETE from kv_key WHERE kv_key_id = ? ''', [ key_id ])
-    self.get_db().commit()
+    with self._write_transaction():
+      key_id, value_id = self._get_key_id_and_value_id(key)
+      if key_id is None:
+        raise KeyError(f"{self.store_name}: {json.dumps(key)}")
+      self._key_id_cache.pop(key, None)
+      self._clear_tags(key_id)
+      # CASCADE deletes the kv_key row referencing this value
+      self._execute(_SQL_DELETE_KEY_VALUE, (key_id,))
 
   def iter_keys(self) -> Iterator[str]:
     cur = self.get_db().cursor()
-    cur.execute('''SELECT key_name FROM kv_key''')
-    for row in cur:
+    cur.execute(_SQL_ITER_KEYS)
+    for row in _iter_rows(cur):
       yield row[0]
 
   def iter_items(self) -> Iterator[Tuple[str, KvValue]]:
     cur = self.get_db().cursor()
-    cur.execute('''SELECT key_name, kv_type, json_text FROM kv_key INNER JOIN kv_value on kv_key.kv_value_id = kv_value.kv_value_id''')
-    for row in cur:
-      key: str = row[0]
-      kv_type: str = row[1]
-      if kv_type != 'xjson':
-        raise ValueError(f"Unrecognized kv_type in kv_value table: {kv_type}")
-      json_text: str = row[2]
-      json_data: Jsonable = json.loads(json_text)
-      xjson_data = xjson_decode(json_data)
-      value = KvValue(xjson_data)
-      yield key, value
-  
+    cur.execute(_SQL_ITER_ITEMS)
+    decode = _decode_kv_value
+    for row in _iter_rows(cur):
+      yield row[0], decode(row[1], row[2])
+
   def items_with_tags(self) -> Iterable[Tuple[str, KvValue, Dict[str, KvValue]]]:
+    # A single LEFT JOIN streams each key's value and tags together, replacing
+    # the old one-tag-query-per-key pattern (1+N round trips); rows arrive
+    # grouped by kv_key_id so each group can be assembled as it streams.
     cur = self.get_db().cursor()
-    cur.execute('''SELECT kv_key_id, key_name, kv_type, json_text FROM kv_key INNER JOIN kv_value on kv_key.kv_value_id = kv_value.kv_value_id''')
-    for row in cur:
-      key_id: int = row[0]
+    cur.execute(_SQL_ITEMS_WITH_TAGS)
+    decode = _decode_kv_value
+    for key_id, rows in groupby(_iter_rows(cur), key=lambda row: row[0]):
+      row = next(rows)
       key: str = row[1]
-      kv_type: str = row[2]
-      if kv_type != 'xjson':
-        raise ValueError(f"Unrecognized kv_type in kv_value table: {kv_type}")
-      json_text: str = row[2]
-      json_data: Jsonable = json.loads(json_text)
-      xjson_data = xjson_decode(json_data)
-      value = KvValue(xjson_data)
-      tags = self._get_tags(key_id)
+      value = decode(row[2], row[3])
+      tags: Dict[str, KvValue] = {}
+      while True:
+        tag_name: Optional[str] = row[4]
+        if not tag_name is None:
+          tags[tag_name] = decode(row[5], row[6])
+        row = next(rows, None)
+        if row is None:
+          break
       yield key, value, tags
 
   def iter_values(self) -> Iterator[KvValue]:
@@ -451,18 +603,16 @@ class SqlKvStore(KvStore):
       yield value
 
   def clear(self):
-    cur = self.get_db().cursor()
-    cur.execute('''DELETE FROM kv_value''')
-    # TODO: this may be unnecessary due to CASCADE DELETE
-    cur.execute('''DELETE FROM kv_key''')
-    # TODO: this may be unnecessary due to CASCADE DELETE
-    cur.execute('''DELETE FROM kv_tag''')
-    self.get_db().commit()
+    self._key_id_cache.clear()
+    self._tag_id_cache.clear()
+    with self._write_transaction():
+      cur = self._cursor()
+      # every kv_key and kv_tag row references a kv_value row, so one
+      # DELETE empties all three tables via CASCADE
+      cur.execute(_SQL_CLEAR_VALUES)
 
   def has_key(self, key: str) -> bool:
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT COUNT(*) FROM kv_key WHERE kv_key.key_name = ?''', [ key ])
-    result = cur.fetchone()[0] > 0
+    result = self._execute(_SQL_HAS_KEY, (key,)).fetchone()[0] > 0
     return result
 
   def get_tags(self, key:str) -> Dict[str, KvValue]:
@@ -472,9 +622,7 @@ class SqlKvStore(KvStore):
 
   def get_num_tags(self, key:str) -> int:
     key_id = self._get_required_key_id(key)
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT COUNT(*) kv_tag WHERE kv_key_id = ?''', [ key_id ])
-    result: int = cur.fetchone()[0]
+    result: int = self._execute(_SQL_COUNT_TAGS, (key_id,)).fetchone()[0]
     return result
 
   def get_tag(self, key: str, tag_name: str) -> Optional[KvValue]:
@@ -483,25 +631,26 @@ class SqlKvStore(KvStore):
     return result
 
   def set_tags(self, key, tags: Mapping[str, XJsonable], clear_tags: bool=False):
-    key_id = self._get_required_key_id(key)
-    self._set_tags(key_id, tags, clear_tags=clear_tags)
-    self.get_db().commit()
+    with self._write_transaction():
+      key_id = self._get_required_key_id(key)
+      self._set_tags(key_id, tags, clear_tags=clear_tags)
 
   def set_tag(self, key, tag_name: str, value: XJsonable):
     if not isinstance(value, KvValue):
       value = KvValue(value)
-    key_id = self._get_required_key_id(key)
-    self._set_tag(key_id, tag_name, value)
-    self.get_db().commit()
+    with self._write_transaction():
+      key_id = self._get_required_key_id(key)
+      self._set_tag(key_id, tag_name, value)
 
   def delete_tag(self, key, tag_name: str):
-    key_id = self._get_required_key_id(key)
-    tag_id, value_id = self._get_tag_id_and_value_id(key_id, tag_name)
-    if tag_id is None:
-      raise KeyError(f"{self.store_name}: key {json.dumps(key)}, tag {json.dumps(key)}")
-    assert not value_id is None
-    self._delete_tag_and_value_by_id(tag_id, value_id)
-    self.get_db().commit()
+    with self._write_transaction():
+      key_id = self._get_required_key_id(key)
+      tag_id, value_id = self._get_tag_id_and_value_id(key_id, tag_name)
+      if tag_id is None:
+        raise KeyError(f"{self.store_name}: key {json.dumps(key)}, tag {json.dumps(key)}")
+      assert not value_id is None
+      self._tag_id_cache.pop((key_id, tag_name), None)
+      self._delete_tag_and_value_by_id(tag_id, value_id)
 
   def tag_names(self, key: str) -> Iterable[str]:
     key_id = self._get_required_key_id(key)
@@ -520,8 +669,8 @@ class SqlKvStore(KvStore):
     return self._has_tag(key_id, tag_name)
 
   def num_keys(self) -> int:
-    cur = self.get_db().cursor()
-    cur.execute('''SELECT COUNT(*) FROM kv_key''')
+    cur = self._cursor()
+    cur.execute(_SQL_COUNT_KEYS)
     result: int = cur.fetchone()[0]
     return result
 
@@ -151,6 +151,24 @@ class KvStore(MutableMapping[str, KvValue]):
   def set_value(self, key: str, value: XJsonable):
     self.set_value_and_tags(key, value, {}, clear_tags=False)
 
+  def set_values_and_tags(self, items: Iterable[Tuple[str, XJsonable, Mapping[str, XJsonable]]], clear_tags: bool=False):
+    """Set the KvValues and tags for multiple keys. Keys that do not exist are created.
+
+    Subclasses backed by transactional storage should override this to perform
+    the whole batch in a single transaction.
+
+    Args:
+        items (Iterable[Tuple[str, XJsonable, Mapping[str, XJsonable]]]):
+                  An iterable of (key, value, tags) tuples as accepted by set_value_and_tags
+        clear_tags (bool, optional): If true, any existing tags on each key will be cleared
+                  before setting new tags. Defaults to False.
+
+    Raises:
+        KvReadOnlyError: The KvStore does not support writing the requested values or keys
+    """
+    for key, value, tags in items:
+      self.set_value_and_tags(key, value, tags, clear_tags=clear_tags)
+
   def delete_value(self, key: str) -> None:
     if not self.has_key(key):
       raise KeyError(f"{self.store_name}: {json.dumps(key)}")
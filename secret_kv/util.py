@@ -11,9 +11,42 @@ from .internal_types import Jsonable
 import json
 import hashlib
 import os
+from functools import lru_cache
+
+@lru_cache(maxsize=256)
+def _norm_path_cached(pathname: str) -> str:
+  return os.path.abspath(os.path.expanduser(pathname))
+
+def norm_path(pathname: str) -> str:
+  """Returns os.path.abspath(os.path.expanduser(pathname)), with caching.
+
+  abspath resolves relative paths against the current working directory
+  (a getcwd syscall per call), so only absolute and home-relative inputs
+  are cached; relative paths are normalized fresh every time."""
+  if pathname.startswith('~') or os.path.isabs(pathname):
+    return _norm_path_cached(pathname)
+  return os.path.abspath(os.path.expanduser(pathname))
+
+# hash_pathname digests only disambiguate keyring service keys, so they are
+# not security-sensitive; usedforsecurity=False (Python 3.9+) skips OpenSSL's
+# FIPS/EVP init path while keeping the digest (and existing keyring entries)
+# bit-identical. SHA-1 must not be swapped for another algorithm here.
+try:
+  hashlib.sha1(b'', usedforsecurity=False)
+  def _sha1_hex(data: bytes) -> str:
+    return hashlib.sha1(data, usedforsecurity=False).hexdigest()
+except TypeError:
+  def _sha1_hex(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+@lru_cache(maxsize=256)
+def _hash_abs_pathname(abs_pathname: str) -> str:
+  return _sha1_hex(abs_pathname.encode("utf-8"))
 
 def hash_pathname(pathname: str) -> str:
-  result = hashlib.sha1(os.path.abspath(os.path.expanduser(pathname)).encode("utf-8")).hexdigest()
+  # The cache is keyed on the normalized absolute path rather than the raw
+  # argument, so relative paths remain correct if the working directory changes.
+  result = _hash_abs_pathname(norm_path(pathname))
   return result
 
 
@@ -31,6 +31,13 @@ import importlib
 
 from .util import clone_json_data, full_type, full_name_of_type
 
+# NOTE: persisted value text must be serialized with stdlib json, not orjson:
+# orjson raises on integers beyond 64 bits and silently writes NaN/Infinity as
+# null, both of which stdlib handles, and mixed codecs would break json_text's
+# role as a canonical form for equality and sorting.
+def _dumps_canonical(data: Jsonable) -> str:
+  return json.dumps(data, sort_keys=True, separators=(',',':'))
+
 _xjson_type_key_pattern = re.compile(r'^@+xjson_type$')
 
 class XJsonSerializable:
@@ -246,8 +253,9 @@ class KvValue(XJsonSerializable):
 
   _json_data: Jsonable
   """The simple JSON-serializable value that represents the KvValue. immutable"""
-  _json_text: str
-  """The serialized JSON string that represents the value. immutable"""
+  _json_text: Optional[str] = None
+  """The serialized JSON string that represents the value, computed lazily on
+     first use of json_text. immutable once computed"""
   _xjson_data: XJsonable
   """The extended JSON-serializable value that represents the native instantiated KvValue"""
 
@@ -256,7 +264,18 @@ class KvValue(XJsonSerializable):
     """
     self._xjson_data = deepcopy(data)
     self._json_data = xjson_encode(self._xjson_data)
-    self._json_text = json.dumps(self._json_data, sort_keys=True, separators=(',',':'))
+
+  _Cls = TypeVar("_Cls", bound='KvValue')
+  @classmethod
+  def _from_json_data(cls: Type[_Cls], json_data: Jsonable) -> _Cls:
+    """Builds a KvValue directly from trusted, already-encoded simple JSON data
+       (e.g., as persisted by a kv store), skipping the deepcopy and re-encode
+       that __init__ performs. The caller must not modify json_data afterward.
+    """
+    obj: 'KvValue' = cls.__new__(cls)
+    obj._json_data = json_data
+    obj._xjson_data = xjson_decode(json_data)
+    return obj
   
   @property
   def json_data(self) -> Jsonable:
@@ -270,8 +289,14 @@ class KvValue(XJsonSerializable):
 
   @property
   def json_text(self) -> str:
-    """The serialized JSON text representation of the value"""
-    return self._json_text
+    """The serialized JSON text representation of the value. Serialized once on
+       first access and cached; values read back from a store that never need
+       re-serialization skip json.dumps entirely."""
+    result = self._json_text
+    if result is None:
+      result = _dumps_canonical(self._json_data)
+      self._json_text = result
+    return result
 
   def as_simple_jsonable(self) -> Jsonable:
     return xjson_decode_simple_jsonable(self.json_data)
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+_PROBE = """
+import sys
+before = set(sys.modules)
+import secret_kv
+loaded = [name for name in sys.modules if name not in before]
+print('\\n'.join(sorted(loaded)))
+"""
+
+
+def test_import_is_lazy():
+    """Importing secret_kv must not pull in its submodules or their heavy deps."""
+    out = subprocess.run(
+        [sys.executable, '-c', _PROBE],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    loaded = set(out.split())
+    assert 'secret_kv' in loaded
+    for name in ('secret_kv.store', 'secret_kv.sql_store', 'secret_kv.simple',
+                 'sqlcipher3', 'keyring'):
+        assert name not in loaded, f"import secret_kv eagerly loaded {name}"
@@ -0,0 +1,59 @@
+import pytest
+
+sqlcipher3 = pytest.importorskip('sqlcipher3')
+
+from secret_kv.sql_store import SqlKvStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / 'kv.db')
+    db = sqlcipher3.connect(path)
+    result = SqlKvStore(store_name=path, db=db, passphrase='test-passphrase')
+    result.initialize_new_db()
+    yield result
+    db.close()
+
+
+def _table_counts(store):
+    cur = store.get_db().cursor()
+    counts = {}
+    for table in ('kv_key', 'kv_tag', 'kv_value'):
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cur.fetchone()[0]
+    return counts
+
+
+def test_cascade_delete(store):
+    """Deleting a kv_value row must CASCADE to the kv_key/kv_tag rows that
+       reference it; delete paths rely on this instead of issuing explicit
+       DELETEs against the referencing tables."""
+    store.set_value_and_tags('k1', 1, {'t1': 'a', 't2': 'b'})
+    store.set_value_and_tags('k2', 2, {'t3': 'c'})
+    assert _table_counts(store) == {'kv_key': 2, 'kv_tag': 3, 'kv_value': 5}
+
+    store.delete_tag('k1', 't1')
+    assert _table_counts(store) == {'kv_key': 2, 'kv_tag': 2, 'kv_value': 4}
+    assert sorted(store.get_tags('k1').keys()) == ['t2']
+
+    store.delete_value('k1')
+    assert _table_counts(store) == {'kv_key': 1, 'kv_tag': 1, 'kv_value': 2}
+    assert store.get_value('k1') is None
+    assert store.get_value('k2').data == 2
+    assert store.get_tag('k2', 't3').data == 'c'
+
+    store.clear()
+    assert _table_counts(store) == {'kv_key': 0, 'kv_tag': 0, 'kv_value': 0}
+
+
+def test_set_tags_replaces_values_without_orphans(store):
+    store.set_value_and_tags('k1', 1, {'t1': 'a', 't2': 'b'})
+    store.set_tags('k1', {'t1': 'x', 't3': 'c'})
+    tags = dict((name, v.data) for name, v in store.get_tags('k1').items())
+    assert tags == {'t1': 'x', 't2': 'b', 't3': 'c'}
+    assert _table_counts(store) == {'kv_key': 1, 'kv_tag': 3, 'kv_value': 4}
+
+    store.set_tags('k1', {'t9': 'z'}, clear_tags=True)
+    tags = dict((name, v.data) for name, v in store.get_tags('k1').items())
+    assert tags == {'t9': 'z'}
+    assert _table_counts(store) == {'kv_key': 1, 'kv_tag': 1, 'kv_value': 2}